@@ -1,13 +1,16 @@
 import json
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from redbot.core.bot import Red
-
-from .pokeduel import pokeduel
+if TYPE_CHECKING:
+    from redbot.core.bot import Red
 
 with open(Path(__file__).parent / "info.json") as fp:
     __red_end_user_data_statement__ = json.load(fp)["end_user_data_statement"]
 
 
-async def setup(bot: Red) -> None:
-    await bot.add_cog(pokeduel(bot))
+async def setup(bot: "Red") -> None:
+    # Imported here so the rules engine and its command-line tools run without Red or discord.py
+    from .pokeduel import PokeDuel
+
+    await bot.add_cog(PokeDuel(bot))
@@ -0,0 +1,185 @@
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import sys
+from pathlib import Path
+
+DATA_DIR = Path(__file__).parent
+POKEMON_FILE = 'pokemon.json'
+PLATES_FILE = 'plates.json'
+CATALOG_FILE = 'catalog.bin'
+# Bump whenever the normalised record layout changes so stale catalogs are rebuilt
+CATALOG_VERSION = 1
+
+MOVE_COLOURS = ('White', 'Purple', 'Gold', 'Blue', 'Red')
+RARITIES = ('C', 'UC', 'R', 'EX', 'UX')
+
+
+class Catalog:
+    """Normalised species and plate data compiled from the JSON sources."""
+
+    __slots__ = ('source_hash', 'pokemon', 'plates')
+
+    def __init__(self, source_hash, pokemon, plates):
+        self.source_hash = source_hash
+        self.pokemon = pokemon
+        self.plates = plates
+
+
+def hash_sources(data_dir=DATA_DIR):
+    """Return a content hash of the JSON sources and the catalog layout version."""
+    digest = hashlib.sha256(str(CATALOG_VERSION).encode())
+    for filename in (POKEMON_FILE, PLATES_FILE):
+        with open(Path(data_dir) / filename, 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def _int_field(value, field, owner):
+    if isinstance(value, int):
+        return value
+    value = value.strip()
+    if not value:
+        return 0
+    if not value.isdigit():
+        raise ValueError(f"{owner}: {field} must be a whole number, got {value!r}.")
+    return int(value)
+
+
+def normalise_move(move, owner):
+    name = sys.intern(move['Name'].strip())
+    move_type = move['Move Type'].strip()
+    colour, _, suffix = move_type.partition(' ')
+    colour = colour.capitalize()
+    if colour not in MOVE_COLOURS:
+        raise ValueError(f"{owner}: move {name!r} has unknown move type {move_type!r}.")
+    if move['Size'] < 0:
+        raise ValueError(f"{owner}: move {name!r} has a negative size.")
+
+    damage = move['Damage'].strip() if isinstance(move['Damage'], str) else move['Damage']
+    stars = 0
+    modifier = ''
+    if isinstance(damage, str):
+        digits = damage.rstrip('x+')
+        modifier = damage[len(digits):]
+        if digits.isdigit():
+            damage = int(digits)
+        elif not digits.strip('☆'):
+            # Stars (Purple moves) or nothing at all (Blue and Red moves): no damage
+            stars, damage = len(digits), 0
+        else:
+            raise ValueError(f"{owner}: move {name!r} has unreadable damage {move['Damage']!r}.")
+
+    return {
+        'Size': move['Size'],
+        'Name': name,
+        'Move Type': sys.intern(f"{colour} {suffix}" if suffix else colour),
+        'Additional Notes': sys.intern(move['Additional Notes'].strip()),
+        'Damage': damage,
+        'Damage Modifier': sys.intern(modifier),
+        'Stars': stars,
+    }
+
+
+def normalise_pokemon(name, record):
+    rarity = record['Rarity'].strip()
+    if rarity not in RARITIES:
+        raise ValueError(f"{name}: unknown rarity {rarity!r}.")
+    return {
+        'Name': sys.intern(name),
+        'Movement': _int_field(record['Movement'], 'Movement', name),
+        'Rarity': sys.intern(rarity),
+        'Type': [sys.intern(pokemon_type) for pokemon_type in record['Type']],
+        'Special Ability': record['Special Ability'].strip(),
+        'Base Wheel Size': [normalise_move(move, name) for move in record['Base Wheel Size']],
+    }
+
+
+def normalise_plate(plate):
+    rarity = plate['Rarity'].strip()
+    if rarity not in RARITIES:
+        raise ValueError(f"{plate['ID']}: unknown rarity {rarity!r}.")
+    return {
+        'ID': plate['ID'],
+        'Color': sys.intern(plate['Color'].strip()),
+        'Name': plate['Name'].strip(),
+        'Rarity': sys.intern(rarity),
+        'Cost': _int_field(plate['Cost'], 'Cost', plate['ID']),
+        'Effect': plate['Effect'].strip(),
+    }
+
+
+def compile_catalog(data_dir=DATA_DIR):
+    """Validate and normalise the JSON sources into a Catalog."""
+    data_dir = Path(data_dir)
+    source_hash = hash_sources(data_dir)
+    with open(data_dir / POKEMON_FILE, 'r') as file:
+        pokemon_data = json.load(file)
+    with open(data_dir / PLATES_FILE, 'r') as file:
+        plates_data = json.load(file)['plates']
+
+    pokemon = {name: normalise_pokemon(name, record) for name, record in pokemon_data.items()}
+    plates = [normalise_plate(plate) for plate in plates_data]
+    return Catalog(source_hash, pokemon, plates)
+
+
+def write_catalog(catalog, path):
+    # Write to a temporary file first so a concurrent reader never sees a partial catalog
+    path = Path(path)
+    temp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+    with open(temp_path, 'wb') as file:
+        pickle.dump((CATALOG_VERSION, catalog.source_hash, catalog.pokemon, catalog.plates), file,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+
+
+def read_catalog(path, source_hash):
+    """Return the compiled catalog at ``path``, or None if it's missing, unreadable or stale."""
+    try:
+        with open(path, 'rb') as file:
+            version, compiled_hash, pokemon, plates = pickle.load(file)
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+        return None
+    if version != CATALOG_VERSION or compiled_hash != source_hash:
+        return None
+    return Catalog(compiled_hash, pokemon, plates)
+
+
+def load_catalog(data_dir=DATA_DIR):
+    """Load the compiled catalog, recompiling it only when the JSON sources changed."""
+    data_dir = Path(data_dir)
+    catalog = read_catalog(data_dir / CATALOG_FILE, hash_sources(data_dir))
+    if catalog is None:
+        catalog = compile_catalog(data_dir)
+        try:
+            write_catalog(catalog, data_dir / CATALOG_FILE)
+        except OSError:
+            pass  # A read-only install still works, it just recompiles each load
+    return catalog
+
+
+_catalog = None
+
+
+def get_catalog():
+    """Return the process-wide catalog, loading it on first use."""
+    global _catalog
+    if _catalog is None:
+        _catalog = load_catalog()
+    return _catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile pokemon.json and plates.json into a binary catalog.")
+    parser.add_argument('--data-dir', default=DATA_DIR, help="Directory holding the JSON sources")
+    args = parser.parse_args()
+
+    catalog = compile_catalog(args.data_dir)
+    write_catalog(catalog, Path(args.data_dir) / CATALOG_FILE)
+    print(f"Compiled {len(catalog.pokemon)} Pokémon and {len(catalog.plates)} plates ({catalog.source_hash[:12]})")
+
+
+if __name__ == '__main__':
+    main()
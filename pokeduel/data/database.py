@@ -1,13 +1,45 @@
+import asyncio
 import sqlite3
 import json
-from discord.ext import commands
-from discord.ui import Button, View, ButtonStyle, Select, SelectOption
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pokeduel.utils.cache import LRUCache
+
+CURRENCIES = ('crystals', 'dust')
+# UPDATE ... RETURNING needs SQLite 3.35; older builds re-read the balance inside the same transaction
+SUPPORTS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+# Per-connection pragmas; WAL lets the reader pool run alongside the single writer
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -8192",
+    "PRAGMA mmap_size = 67108864",
+)
+STATEMENT_CACHE_SIZE = 256
 
 
 class DatabaseManager:
-    def __init__(self, db_path):
-        self.conn = sqlite3.connect(db_path)
-        self.create_tables()
+    # Users migrated per transaction, so the legacy blob migration never holds the write lock for long
+    MIGRATION_BATCH_SIZE = 500
+
+    def __init__(self, db_path, read_only=False):
+        # Every query uses fixed SQL text, so sqlite3's statement cache keeps them all prepared.
+        # Connections are confined to one pool thread each; the flag only lets close() run elsewhere.
+        self.conn = sqlite3.connect(db_path, cached_statements=STATEMENT_CACHE_SIZE, check_same_thread=False)
+        self.read_only = read_only
+        self.configure()
+        if not read_only:
+            self.create_tables()
+            self.migrate_legacy_blobs()
+
+    def configure(self):
+        if not self.read_only:
+            self.conn.execute("PRAGMA journal_mode = WAL")
+        for pragma in CONNECTION_PRAGMAS:
+            self.conn.execute(pragma)
+        if self.read_only:
+            self.conn.execute("PRAGMA query_only = ON")
 
     def create_tables(self):
         with self.conn:
@@ -20,15 +52,114 @@ class DatabaseManager:
                     party TEXT 
                 );
             ''')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS inventory_items (
+                    user_id INTEGER NOT NULL REFERENCES users(id),
+                    item TEXT NOT NULL,
+                    count INTEGER NOT NULL DEFAULT 1,
+                    PRIMARY KEY (user_id, item)
+                ) WITHOUT ROWID;
+            ''')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS party_slots (
+                    user_id INTEGER NOT NULL REFERENCES users(id),
+                    slot INTEGER NOT NULL,
+                    item TEXT NOT NULL,
+                    PRIMARY KEY (user_id, slot)
+                ) WITHOUT ROWID;
+            ''')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS gacha_pity (
+                    user_id INTEGER NOT NULL REFERENCES users(id),
+                    banner TEXT NOT NULL,
+                    pulls_since_top INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (user_id, banner)
+                ) WITHOUT ROWID;
+            ''')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS z_moves (
+                    user_id INTEGER NOT NULL REFERENCES users(id),
+                    pokemon TEXT NOT NULL,
+                    move TEXT NOT NULL,
+                    PRIMARY KEY (user_id, pokemon)
+                ) WITHOUT ROWID;
+            ''')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS duels (
+                    game_id TEXT PRIMARY KEY,
+                    channel_id INTEGER,
+                    seed INTEGER,
+                    setup TEXT,
+                    finished INTEGER NOT NULL DEFAULT 0,
+                    winner INTEGER
+                ) WITHOUT ROWID;
+            ''')
+            # Append-only: one row per input applied to a duel, in order
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS duel_journal (
+                    game_id TEXT NOT NULL REFERENCES duels(game_id),
+                    sequence INTEGER NOT NULL,
+                    action TEXT NOT NULL,
+                    PRIMARY KEY (game_id, sequence)
+                ) WITHOUT ROWID;
+            ''')
+            # Latest snapshot per duel; restoring replays the journal after its sequence
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS duel_snapshots (
+                    game_id TEXT PRIMARY KEY REFERENCES duels(game_id),
+                    sequence INTEGER NOT NULL,
+                    state TEXT NOT NULL
+                ) WITHOUT ROWID;
+            ''')
+
+    def migrate_legacy_blobs(self):
+        """Move JSON inventory and party blobs from ``users`` into the relational tables.
+
+        Runs in small batches and clears each blob as it goes, so it is safe to
+        re-run and resumes where an interrupted migration stopped.
+        """
+        last_id = None
+        while True:
+            with self.conn:
+                rows = self.conn.execute(
+                    "SELECT id, inventory, party FROM users "
+                    "WHERE (inventory IS NOT NULL OR party IS NOT NULL) AND (? IS NULL OR id > ?) "
+                    "ORDER BY id LIMIT ?",
+                    (last_id, last_id, self.MIGRATION_BATCH_SIZE)).fetchall()
+                for user_id, inventory_str, party_str in rows:
+                    self._insert_inventory(user_id, json.loads(inventory_str or '[]'))
+                    self._insert_party(user_id, json.loads(party_str or '[]'))
+                self.conn.executemany("UPDATE users SET inventory = NULL, party = NULL WHERE id = ?",
+                                      [(row[0],) for row in rows])
+            if len(rows) < self.MIGRATION_BATCH_SIZE:
+                return
+            last_id = rows[-1][0]
+
+    def _insert_inventory(self, user_id, items):
+        counts = {}
+        for item in items:
+            counts[item] = counts.get(item, 0) + 1
+        self.conn.executemany(
+            "INSERT INTO inventory_items (user_id, item, count) VALUES (?, ?, ?) "
+            "ON CONFLICT (user_id, item) DO UPDATE SET count = count + excluded.count",
+            [(user_id, item, count) for item, count in counts.items()])
+
+    def _insert_party(self, user_id, party):
+        self.conn.executemany("INSERT OR REPLACE INTO party_slots (user_id, slot, item) VALUES (?, ?, ?)",
+                              [(user_id, slot, item) for slot, item in enumerate(party)])
+
+    def has_started_save(self, user_id):
+        with self.conn:
+            cur = self.conn.execute("SELECT 1 FROM users WHERE id = ?", (user_id,))
+            return cur.fetchone() is not None
 
     def initialize_new_user(self, user_id, crystals=0, dust=0, inventory=None, party=None):
-        if inventory is None:
-            inventory = json.dumps([])
-        if party is None:
-            party = json.dumps([])
         with self.conn:
-            self.conn.execute("INSERT OR IGNORE INTO users (id, crystals, dust, inventory, party) VALUES (?, ?, ?, ?, ?)",
-                              (user_id, crystals, dust, inventory, party))
+            cur = self.conn.execute("INSERT OR IGNORE INTO users (id, crystals, dust) VALUES (?, ?, ?)",
+                                    (user_id, crystals, dust))
+            if cur.rowcount:
+                self._insert_inventory(user_id, inventory or [])
+                self._insert_party(user_id, party or [])
 
     def get_crystals(self, user_id):
         with self.conn:
@@ -48,85 +179,369 @@ class DatabaseManager:
         with self.conn:
             self.conn.execute("UPDATE users SET dust = ? WHERE id = ?", (new_dust_amount, user_id))
 
+    def spend(self, user_id, currency, amount, items=(), pity=None):
+        """Deduct ``amount`` of ``currency`` and grant ``items`` in one transaction.
+
+        The balance check and the deduction are a single conditional UPDATE, so
+        concurrent purchases can never overdraw. Returns the new balance, or
+        None (changing nothing) when the user can't afford it. ``pity`` is an
+        optional ``(banner, pulls, since_top)`` update applied in the same
+        transaction, see ``Banner.pull``.
+        """
+        if currency not in CURRENCIES:
+            raise ValueError(f"Unknown currency {currency!r}.")
+        with self.conn:
+            spend_sql = f"UPDATE users SET {currency} = {currency} - ? WHERE id = ? AND {currency} >= ?"
+            if SUPPORTS_RETURNING:
+                row = self.conn.execute(f"{spend_sql} RETURNING {currency}", (amount, user_id, amount)).fetchone()
+            else:
+                cur = self.conn.execute(spend_sql, (amount, user_id, amount))
+                row = cur.rowcount and self.conn.execute(f"SELECT {currency} FROM users WHERE id = ?",
+                                                         (user_id,)).fetchone()
+            if not row:
+                return None
+            self._insert_inventory(user_id, items)
+            if pity is not None:
+                self._record_pulls(user_id, *pity)
+            return row[0]
+
+    def spend_crystals(self, user_id, amount, items=(), pity=None):
+        return self.spend(user_id, 'crystals', amount, items, pity)
+
+    def spend_dust(self, user_id, amount, items=()):
+        return self.spend(user_id, 'dust', amount, items)
+
+    def get_pity(self, user_id, banner):
+        with self.conn:
+            cur = self.conn.execute("SELECT pulls_since_top FROM gacha_pity WHERE user_id = ? AND banner = ?",
+                                    (user_id, banner))
+            row = cur.fetchone()
+            return row[0] if row else 0
+
+    def _record_pulls(self, user_id, banner, pulls, since_top):
+        # Applied as a delta rather than a stored value so overlapping pulls never lose count
+        self.conn.execute(
+            "INSERT INTO gacha_pity (user_id, banner, pulls_since_top) VALUES (?, ?, ?) "
+            "ON CONFLICT (user_id, banner) DO UPDATE SET pulls_since_top = "
+            "CASE WHEN ? IS NULL THEN pulls_since_top + ? ELSE ? END",
+            (user_id, banner, pulls if since_top is None else since_top, since_top, pulls, since_top))
+
     def get_inventory(self, user_id):
+        """Return the distinct items a user owns."""
+        with self.conn:
+            cur = self.conn.execute("SELECT item FROM inventory_items WHERE user_id = ? ORDER BY item", (user_id,))
+            return [row[0] for row in cur]
+
+    def get_inventory_counts(self, user_id):
+        """Return a mapping of item -> number of copies a user owns."""
         with self.conn:
-            cur = self.conn.execute("SELECT inventory FROM users WHERE id = ?", (user_id,))
-            inventory_str = cur.fetchone()[0]
-            return json.loads(inventory_str)
+            cur = self.conn.execute("SELECT item, count FROM inventory_items WHERE user_id = ?", (user_id,))
+            return dict(cur.fetchall())
 
     def update_inventory(self, user_id, new_inventory):
         with self.conn:
-            inventory_str = json.dumps(new_inventory)
-            self.conn.execute("UPDATE users SET inventory = ? WHERE id = ?", (inventory_str, user_id))
+            self.conn.execute("DELETE FROM inventory_items WHERE user_id = ?", (user_id,))
+            self._insert_inventory(user_id, new_inventory)
+
+    def add_to_inventory(self, user_id, item):
+        self.grant_items(user_id, [item])
+
+    def grant_items(self, user_id, items):
+        """Add many items to a user's inventory with one statement in one transaction."""
+        with self.conn:
+            self._insert_inventory(user_id, items)
+
+    def add_plate_to_inventory(self, user_id, plate):
+        self.add_to_inventory(user_id, plate)
 
     def get_user_party(self, user_id):
         with self.conn:
-            cur = self.conn.execute("SELECT party FROM users WHERE id = ?", (user_id,))
-            party_str = cur.fetchone()[0]
-            return json.loads(party_str)
+            cur = self.conn.execute("SELECT item FROM party_slots WHERE user_id = ? ORDER BY slot", (user_id,))
+            return [row[0] for row in cur]
 
     def update_user_party(self, user_id, new_party):
         with self.conn:
-            party_str = json.dumps(new_party)
-            self.conn.execute("UPDATE users SET party = ? WHERE id = ?", (party_str, user_id))
-
-
-class PokemonSelect(Select):
-    def __init__(self, db, user_id, placeholder, callback_method):
-        super().__init__(placeholder=placeholder, min_values=1, max_values=1)
-        self.db = db
-        self.user_id = user_id
-        self.callback_method = callback_method
-        self.populate_options()
-
-    def populate_options(self):
-        available_items = self.db.get_inventory(self.user_id)
-        self.options = [SelectOption(label=item, value=item) for item in available_items]
-
-    async def callback(self, interaction):
-        selected_item = self.values[0]
-        await self.callback_method(self, selected_item, interaction)
-
-class PartyButtonView(View):
-    def __init__(self, db, user_id):
-        super().__init__()
-        self.db = db
-        self.user_id = user_id
-        self.refresh_view()
-
-    def refresh_view(self):
-        self.clear_items()
-        party = self.db.get_user_party(self.user_id)
-        for i, item in enumerate(party):
-            self.add_item(Button(style=ButtonStyle.primary, label=item, custom_id=f"remove_{i}"))
-
-        self.add_item(PokemonSelect(self.db, self.user_id, 'Add to Party', self.add_to_party))
-
-    async def add_to_party(self, select, item, interaction):
-        party = self.db.get_user_party(self.user_id)
-        party.append(item)
-        self.db.update_user_party(self.user_id, party)
-        self.refresh_view()
-        await interaction.response.send_message(f"{item} added to your party!", ephemeral=True)
-
-    @commands.Cog.listener()
-    async def on_button_click(self, interaction):
-        custom_id = interaction.data['custom_id']
-        action, index = custom_id.split("_")
-        if action == "remove":
-            party = self.db.get_user_party(self.user_id)
-            if 0 <= int(index) < len(party):
-                del party[int(index)]
-                self.db.update_user_party(self.user_id, party)
-                self.refresh_view()
-            await interaction.response.send_message("Item removed from your party.", ephemeral=True)
-
-class PartyManager(commands.Cog):
-    def __init__(self, bot, db_path):
-        self.bot = bot
-        self.db = DatabaseManager(db_path)
-
-    @commands.command()
-    async def party(self, ctx):
-        view = PartyButtonView(self.db, ctx.author.id)
-        await ctx.send("Your party:", view=view)
+            self.conn.execute("DELETE FROM party_slots WHERE user_id = ?", (user_id,))
+            self._insert_party(user_id, new_party)
+
+    def add_to_party(self, user_id, item):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO party_slots (user_id, slot, item) "
+                "SELECT ?, COALESCE(MAX(slot) + 1, 0), ? FROM party_slots WHERE user_id = ?",
+                (user_id, item, user_id))
+
+    def get_z_moves(self, user_id):
+        """Return the user's chosen Z-Move per Pokémon."""
+        with self.conn:
+            cur = self.conn.execute("SELECT pokemon, move FROM z_moves WHERE user_id = ?", (user_id,))
+            return dict(cur.fetchall())
+
+    def set_pokemon_z_move(self, user_id, pokemon, z_move):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO z_moves (user_id, pokemon, move) VALUES (?, ?, ?) "
+                "ON CONFLICT (user_id, pokemon) DO UPDATE SET move = excluded.move",
+                (user_id, pokemon, z_move))
+
+    def remove_item_from_party(self, user_id, index):
+        # Slots only need to stay ordered, not contiguous, so removal is a single delete
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM party_slots WHERE user_id = ? AND slot = "
+                "(SELECT slot FROM party_slots WHERE user_id = ? ORDER BY slot LIMIT 1 OFFSET ?)",
+                (user_id, user_id, index))
+
+    def create_duel(self, game_id, channel_id, seed, setup, snapshot):
+        """Store a new duel's seed, its starting players and parties as ``setup`` JSON, and its first snapshot."""
+        with self.conn:
+            self.conn.execute("INSERT INTO duels (game_id, channel_id, seed, setup) VALUES (?, ?, ?, ?)",
+                              (game_id, channel_id, seed, setup))
+            self._save_snapshot(game_id, snapshot)
+
+    def _save_snapshot(self, game_id, snapshot):
+        sequence, state = snapshot
+        self.conn.execute("INSERT OR REPLACE INTO duel_snapshots (game_id, sequence, state) VALUES (?, ?, ?)",
+                          (game_id, sequence, state))
+
+    def record_duel_turn(self, game_id, actions, snapshot=None, finished=False, winner=None):
+        """Append a turn's ``(sequence, action)`` journal rows, and optionally a new snapshot, in one transaction.
+
+        Parameters:
+            game_id (str): The duel's id.
+            actions (list): ``(sequence, action JSON)`` pairs in the order they were applied.
+            snapshot (tuple): ``(sequence, state JSON)`` replacing the duel's last snapshot, or None.
+            finished (bool): Whether the duel ended with these actions.
+            winner (int): The winning player slot, or None for a draw.
+        """
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO duel_journal (game_id, sequence, action) VALUES (?, ?, ?)",
+                                  [(game_id, sequence, action) for sequence, action in actions])
+            if snapshot is not None:
+                self._save_snapshot(game_id, snapshot)
+            if finished:
+                self.conn.execute("UPDATE duels SET finished = 1, winner = ? WHERE game_id = ?", (winner, game_id))
+
+    def get_open_duels(self):
+        """Return ``(channel_id, snapshot, actions)`` for every unfinished duel.
+
+        ``actions`` are the journal entries written after the snapshot, in order.
+        """
+        with self.conn:
+            rows = self.conn.execute(
+                "SELECT duels.game_id, channel_id, sequence, state FROM duels "
+                "JOIN duel_snapshots ON duel_snapshots.game_id = duels.game_id WHERE finished = 0").fetchall()
+            duels = []
+            for game_id, channel_id, sequence, state in rows:
+                cur = self.conn.execute(
+                    "SELECT action FROM duel_journal WHERE game_id = ? AND sequence > ? ORDER BY sequence",
+                    (game_id, sequence))
+                duels.append((channel_id, json.loads(state), [json.loads(row[0]) for row in cur]))
+            return duels
+
+    def _duel_record(self, game_id, seed, setup, finished, winner):
+        cur = self.conn.execute("SELECT action FROM duel_journal WHERE game_id = ? ORDER BY sequence", (game_id,))
+        return dict(json.loads(setup), game_id=game_id, seed=seed, finished=bool(finished), winner=winner,
+                    actions=[json.loads(row[0]) for row in cur])
+
+    def get_duel_record(self, game_id):
+        """Return everything needed to replay a duel: its seed, setup and every journaled input."""
+        with self.conn:
+            row = self.conn.execute("SELECT game_id, seed, setup, finished, winner FROM duels WHERE game_id = ?",
+                                    (game_id,)).fetchone()
+            return self._duel_record(*row) if row is not None and row[1] is not None else None
+
+    def get_duel_records(self, after=None, limit=500):
+        """Return up to ``limit`` finished duel records ordered by game id, starting after ``after``."""
+        with self.conn:
+            rows = self.conn.execute(
+                "SELECT game_id, seed, setup, finished, winner FROM duels "
+                "WHERE finished = 1 AND seed IS NOT NULL AND (? IS NULL OR game_id > ?) ORDER BY game_id LIMIT ?",
+                (after, after, limit)).fetchall()
+            return [self._duel_record(*row) for row in rows]
+
+    def close(self):
+        self.conn.close()
+
+
+class AsyncDatabaseManager:
+    """Shared, awaitable storage service for the whole cog.
+
+    Writes go to one dedicated writer thread and connection, so they are
+    serialised in submission order and never contend for SQLite's write lock.
+    Reads are spread over a small pool of read-only connections, one per
+    reader thread, which WAL mode lets run alongside the writer. No query ever
+    runs on the event loop.
+
+    Party and inventory reads go through a per-user LRU cache that the writes
+    touching them invalidate or refresh.
+
+    Parameters:
+        db_path (str): Path of the SQLite database file.
+        readers (int): Number of reader threads and connections.
+        cache_size (int): Number of cached party/inventory entries.
+    """
+
+    READ_METHODS = frozenset({'has_started_save', 'get_crystals', 'get_dust', 'get_pity',
+                              'get_inventory', 'get_inventory_counts', 'get_user_party', 'get_z_moves',
+                              'get_open_duels', 'get_duel_record', 'get_duel_records'})
+
+    def __init__(self, db_path, readers=4, cache_size=1024):
+        self._db_path = db_path
+        self.cache = LRUCache(cache_size)
+        # Bumped per cache key around every write, so a read that overlapped a write to its key never fills
+        # the cache, while writes to other users' entries leave it alone
+        self._write_epochs = {}
+        self._db = None
+        self._ready = threading.Event()
+        self._local = threading.local()
+        self._readers = []
+        self._readers_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pokeduel-db-writer',
+                                            initializer=self._open_writer)
+        self._read_executor = ThreadPoolExecutor(max_workers=readers, thread_name_prefix='pokeduel-db-reader',
+                                                 initializer=self._open_reader)
+        # Start the writer now so the schema exists before the first read
+        self._executor.submit(self._ready.wait)
+
+    def _open_writer(self):
+        try:
+            self._db = DatabaseManager(self._db_path)
+        finally:
+            self._ready.set()
+
+    def _open_reader(self):
+        self._ready.wait()
+        reader = DatabaseManager(self._db_path, read_only=True)
+        self._local.db = reader
+        with self._readers_lock:
+            self._readers.append(reader)
+
+    async def _call(self, method, *args):
+        loop = asyncio.get_running_loop()
+        if method in self.READ_METHODS:
+            return await loop.run_in_executor(self._read_executor,
+                                              lambda: getattr(self._local.db, method)(*args))
+        return await loop.run_in_executor(self._executor, lambda: getattr(self._db, method)(*args))
+
+    async def _cached_read(self, user_id, kind, method):
+        key = (user_id, kind)
+        value = self.cache.get(key)
+        if value is None:
+            epoch = self._write_epochs.get(key, 0)
+            value = await self._call(method, user_id)
+            if epoch == self._write_epochs.get(key, 0):
+                self.cache.put(key, value)
+        return value
+
+    def _invalidate(self, user_id, kinds):
+        for kind in kinds:
+            key = (user_id, kind)
+            self._write_epochs[key] = self._write_epochs.get(key, 0) + 1
+            self.cache.pop(key)
+
+    async def _write(self, method, user_id, *args, invalidates=(), update=None):
+        """Run a write, dropping the user's ``invalidates`` cache entries (or refreshing ``update``)."""
+        self._invalidate(user_id, invalidates)
+        try:
+            result = await self._call(method, user_id, *args)
+        finally:
+            self._invalidate(user_id, invalidates)
+        if update is not None:
+            self.cache.put((user_id, update[0]), update[1])
+        return result
+
+    async def has_started_save(self, user_id):
+        return await self._call('has_started_save', user_id)
+
+    async def initialize_new_user(self, user_id, crystals=0, dust=0, inventory=None, party=None):
+        return await self._write('initialize_new_user', user_id, crystals, dust, inventory, party,
+                                 invalidates=('inventory', 'party'))
+
+    async def get_crystals(self, user_id):
+        return await self._call('get_crystals', user_id)
+
+    async def update_crystals(self, user_id, new_crystal_count):
+        return await self._call('update_crystals', user_id, new_crystal_count)
+
+    async def get_dust(self, user_id):
+        return await self._call('get_dust', user_id)
+
+    async def update_dust(self, user_id, new_dust_amount):
+        return await self._call('update_dust', user_id, new_dust_amount)
+
+    async def spend_crystals(self, user_id, amount, items=(), pity=None):
+        return await self._write('spend_crystals', user_id, amount, items, pity, invalidates=('inventory',))
+
+    async def spend_dust(self, user_id, amount, items=()):
+        return await self._write('spend_dust', user_id, amount, items, invalidates=('inventory',))
+
+    async def get_pity(self, user_id, banner):
+        return await self._call('get_pity', user_id, banner)
+
+    async def get_inventory(self, user_id):
+        return sorted(await self._cached_read(user_id, 'inventory', 'get_inventory_counts'))
+
+    async def update_inventory(self, user_id, new_inventory):
+        return await self._write('update_inventory', user_id, new_inventory, invalidates=('inventory',))
+
+    async def get_inventory_counts(self, user_id):
+        return dict(await self._cached_read(user_id, 'inventory', 'get_inventory_counts'))
+
+    async def add_to_inventory(self, user_id, item):
+        return await self._write('add_to_inventory', user_id, item, invalidates=('inventory',))
+
+    async def grant_items(self, user_id, items):
+        return await self._write('grant_items', user_id, items, invalidates=('inventory',))
+
+    async def add_plate_to_inventory(self, user_id, plate):
+        return await self._write('add_plate_to_inventory', user_id, plate, invalidates=('inventory',))
+
+    async def get_user_party(self, user_id):
+        return list(await self._cached_read(user_id, 'party', 'get_user_party'))
+
+    async def update_user_party(self, user_id, new_party):
+        return await self._write('update_user_party', user_id, new_party, invalidates=('party',),
+                                 update=('party', list(new_party)))
+
+    async def add_to_party(self, user_id, item):
+        return await self._write('add_to_party', user_id, item, invalidates=('party',))
+
+    async def get_z_moves(self, user_id):
+        return await self._call('get_z_moves', user_id)
+
+    async def set_pokemon_z_move(self, user_id, pokemon, z_move):
+        return await self._call('set_pokemon_z_move', user_id, pokemon, z_move)
+
+    async def remove_item_from_party(self, user_id, index):
+        return await self._write('remove_item_from_party', user_id, index, invalidates=('party',))
+
+    async def create_duel(self, game_id, channel_id, seed, setup, snapshot):
+        return await self._call('create_duel', game_id, channel_id, seed, setup, snapshot)
+
+    async def record_duel_turn(self, game_id, actions, snapshot=None, finished=False, winner=None):
+        return await self._call('record_duel_turn', game_id, actions, snapshot, finished, winner)
+
+    async def get_open_duels(self):
+        return await self._call('get_open_duels')
+
+    async def get_duel_record(self, game_id):
+        return await self._call('get_duel_record', game_id)
+
+    async def get_duel_records(self, after=None, limit=500):
+        return await self._call('get_duel_records', after, limit)
+
+    def _shutdown(self):
+        self._read_executor.shutdown(wait=True)
+        for reader in self._readers:
+            reader.close()
+        self._readers.clear()
+        self._executor.shutdown(wait=True)
+        if self._db is not None:
+            # The last connection out checkpoints the WAL back into the main file
+            self._db.close()
+
+    async def close(self):
+        """Drain pending queries, then close every pooled connection."""
+        await asyncio.get_running_loop().run_in_executor(None, self._shutdown)
+
@@ -0,0 +1,106 @@
+import argparse
+import json
+import logging
+from pathlib import Path
+
+import numpy as np
+
+from pokeduel.data.catalog import get_catalog
+from pokeduel.logic.combat import CombatManager
+from pokeduel.logic.wheel import WheelTable
+
+DATA_DIR = Path(__file__).parent
+MATRIX_FILE = 'matchups.npy'
+INDEX_FILE = 'matchups.json'
+MATCHUP_COLUMNS = ('Player 1 Wins', 'Draw', 'Player 2 Wins')
+# Bump whenever battle resolution changes so matrices built under the old rules are rejected
+MATRIX_VERSION = 1
+
+log = logging.getLogger("red.pokeduel.matchups")
+
+
+def build_matchup_matrix(pokemon_data):
+    """Return species names and an (N, N, 3) float32 matrix of exact single-battle odds.
+
+    Row ``i``, column ``j`` holds the odds of species ``i`` (as Player 1) against
+    species ``j``, ordered as ``MATCHUP_COLUMNS``. Species without a wheel get NaN.
+    """
+    names = list(pokemon_data)
+    segments = [WheelTable.from_pokemon(pokemon_data[name]).effective_segments() for name in names]
+    matrix = np.full((len(names), len(names), len(MATCHUP_COLUMNS)), np.nan, dtype=np.float32)
+    for i, segments1 in enumerate(segments):
+        if not segments1:
+            continue
+        for j, segments2 in enumerate(segments):
+            if not segments2:
+                continue
+            probabilities = CombatManager.resolve_segments(segments1, segments2)
+            matrix[i, j] = [probabilities[column] for column in MATCHUP_COLUMNS]
+    return names, matrix
+
+
+def write_matchup_matrix(pokemon_data, source_hash, output_dir=DATA_DIR):
+    """Build the all-pairs matrix and write it as a ``.npy`` file plus a JSON species index.
+
+    The index is stamped with ``source_hash``, the catalog's ``source_hash``,
+    so the matrix is only served for the catalog it was built from.
+    """
+    output_dir = Path(output_dir)
+    names, matrix = build_matchup_matrix(pokemon_data)
+    np.save(output_dir / MATRIX_FILE, matrix)
+    with open(output_dir / INDEX_FILE, 'w') as file:
+        json.dump({'version': MATRIX_VERSION, 'source_hash': source_hash,
+                   'columns': MATCHUP_COLUMNS, 'species': names}, file)
+    return output_dir / MATRIX_FILE
+
+
+class MatchupMatrix:
+    """Read-only, memory-mapped view of a prebuilt all-pairs matchup matrix."""
+
+    def __init__(self, matrix, species):
+        self.matrix = matrix
+        self.index = {name: row for row, name in enumerate(species)}
+
+    @classmethod
+    def open(cls, data_dir=DATA_DIR, source_hash=None):
+        """Map the matrix read-only, or return None when it hasn't been built or is stale.
+
+        ``source_hash`` defaults to the current catalog's; a matrix built from
+        another catalog, or under older rules, is rejected with a warning.
+        """
+        data_dir = Path(data_dir)
+        if not (data_dir / MATRIX_FILE).exists() or not (data_dir / INDEX_FILE).exists():
+            return None
+        with open(data_dir / INDEX_FILE, 'r') as file:
+            index = json.load(file)
+        if source_hash is None:
+            source_hash = get_catalog().source_hash
+        if index.get('version') != MATRIX_VERSION or index.get('source_hash') != source_hash:
+            log.warning("Ignoring the matchup matrix in %s: it was built from another catalog or older rules. "
+                        "Rebuild it with `python -m pokeduel.data.matchups`.", data_dir)
+            return None
+        return cls(np.load(data_dir / MATRIX_FILE, mmap_mode='r'), index['species'])
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def lookup(self, name1, name2):
+        """Return the odds of ``name1`` against ``name2``, or None if either has no wheel."""
+        row = self.matrix[self.index[name1], self.index[name2]]
+        if np.isnan(row[0]):
+            return None
+        return {column: float(value) for column, value in zip(MATCHUP_COLUMNS, row)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the all-pairs PokeDuel matchup matrix.")
+    parser.add_argument('--output', default=DATA_DIR, help="Directory to write the matrix and index into")
+    args = parser.parse_args()
+
+    catalog = get_catalog()
+    path = write_matchup_matrix(catalog.pokemon, catalog.source_hash, args.output)
+    print(f"Wrote {len(catalog.pokemon)}x{len(catalog.pokemon)} matchup matrix to {path} ({catalog.source_hash[:12]})")
+
+
+if __name__ == '__main__':
+    main()
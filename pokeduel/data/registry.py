@@ -0,0 +1,62 @@
+import threading
+from types import MappingProxyType
+
+from pokeduel.data.catalog import get_catalog
+from pokeduel.logic.pokemon import Pokemon
+
+
+class SpeciesRegistry:
+    """Process-wide, read-only index over the compiled catalog.
+
+    Every component shares the same records, so the dataset lives in memory
+    once and lookups by name are dictionary hits rather than scans.
+    """
+
+    def __init__(self, catalog):
+        self.source_hash = catalog.source_hash
+        self.pokemon = MappingProxyType(catalog.pokemon)
+        self.names = tuple(catalog.pokemon)
+        self.plates = tuple(catalog.plates)
+        self.plates_by_name = MappingProxyType({plate['Name']: plate for plate in catalog.plates})
+
+        rarity_index = {}
+        for name, record in catalog.pokemon.items():
+            rarity_index.setdefault(record['Rarity'], []).append(name)
+        self.names_by_rarity = MappingProxyType({rarity: tuple(names) for rarity, names in rarity_index.items()})
+        self._flyweights = {}
+
+    def __contains__(self, name):
+        return name in self.pokemon
+
+    def __getitem__(self, name):
+        return self.pokemon[name]
+
+    def __len__(self):
+        return len(self.pokemon)
+
+    def get(self, name, default=None):
+        return self.pokemon.get(name, default)
+
+    def get_plate(self, name, default=None):
+        return self.plates_by_name.get(name, default)
+
+    def species(self, name):
+        """Return the shared Pokemon wrapper for ``name``, creating it on first use."""
+        pokemon = self._flyweights.get(name)
+        if pokemon is None:
+            pokemon = self._flyweights.setdefault(name, Pokemon(self.pokemon[name]))
+        return pokemon
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Return the process-wide species registry, loading the catalog on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = SpeciesRegistry(get_catalog())
+    return _registry
@@ -1,129 +1,159 @@
-import json
-import random
-from discord import ButtonStyle
-from discord.ext import commands
-from discord.ui import Button, Select, SelectOption
-from pokeduel.data.database import DatabaseManager
-
-with open('plates.json', 'r') as f:
-    plates_data = json.load(f)
-
-class ShopView(commands.View):
-    def __init__(self, user_id, db_path, shop_data, plates_data):
-        super().__init__()
-        self.user_id = user_id
-        self.db = DatabaseManager(db_path)
-        self.shop_data = shop_data
-        self.plates_data = plates_data
+from collections import Counter
+from discord import ButtonStyle, SelectOption
+from discord.ui import View, Select, button
+from pokeduel.utils.constants import DUST_COSTS, SINGLE_ROLL_COST, MULTI_ROLL_COST, BULK_ROLL_COUNT, BULK_ROLL_COST
+
+RARITY_ORDER = ('UX', 'EX', 'R', 'UC', 'C')
+MAX_SUMMARY_LENGTH = 1800
+# Discord allows 25 options per select; two are kept for the previous/next page entries
+PAGE_SIZE = 23
+PREVIOUS_PAGE, NEXT_PAGE = '__previous_page__', '__next_page__'
+
+
+def summarise_pulls(pulls):
+    """Group pulls into a 'Name xN (Rarity)' list, rarest first, that fits in one message."""
+    counts = Counter(pulls)
+    ordered = sorted(counts.items(), key=lambda entry: (RARITY_ORDER.index(entry[0][1]), -entry[1], entry[0][0]))
+    summary = ""
+    for shown, ((name, rarity), count) in enumerate(ordered):
+        entry = f"{name} x{count} ({rarity})" if count > 1 else f"{name} ({rarity})"
+        if len(summary) + len(entry) > MAX_SUMMARY_LENGTH:
+            return f"{summary}, and {len(ordered) - shown} more"
+        summary = f"{summary}, {entry}" if summary else entry
+    return summary
+
+
+class PagedSelect(Select):
+    """A select over any number of names, shown a page at a time.
+
+    The first and last options turn the page; picking a name awaits
+    ``on_select(interaction, name)``.
+    """
+
+    def __init__(self, placeholder, names, custom_id, on_select):
+        super().__init__(placeholder=placeholder, custom_id=custom_id)
+        self.names = list(names)
+        self.title = placeholder
+        self.on_select = on_select
+        self.page_count = max(1, -(-len(self.names) // PAGE_SIZE))
+        self.show_page(0)
+
+    def show_page(self, page):
+        self.page = page
+        start = page * PAGE_SIZE
+        options = [SelectOption(label=name, value=name) for name in self.names[start:start + PAGE_SIZE]]
+        if page > 0:
+            options.insert(0, SelectOption(label="◀ Previous page", value=PREVIOUS_PAGE))
+        if page < self.page_count - 1:
+            options.append(SelectOption(label="Next page ▶", value=NEXT_PAGE))
+        self.options = options
+        self.placeholder = f"{self.title} ({page + 1}/{self.page_count})" if self.page_count > 1 else self.title
+
+    async def callback(self, interaction):
+        selected = self.values[0]
+        if selected in (PREVIOUS_PAGE, NEXT_PAGE):
+            self.show_page(self.page + (1 if selected == NEXT_PAGE else -1))
+            await interaction.response.edit_message(view=self.view)
+            return
+        await self.on_select(interaction, selected)
 
-        self.current_crystals = self.db.get_crystals(user_id)
-        self.current_dust = self.db.get_dust(user_id)
 
-        self.add_item(self.create_select_menu('Select a Pokémon to buy with dust', shop_data, 'pokemon'))
-        self.add_item(self.create_select_menu('Select a Plate to buy with dust', plates_data, 'plate'))
+class ShopView(View):
+    def __init__(self, user_id, db, engine):
+        super().__init__()
+        self.user_id = user_id
+        self.db = db
+        self.engine = engine
+        self.registry = engine.registry
+
+        self.add_item(self.create_select_menu('Select a Pokémon to buy with dust', self.registry.names, 'pokemon',
+                                              self.select_pokemon))
+        self.add_item(self.create_select_menu('Select a Plate to buy with dust', self.registry.plates_by_name, 'plate',
+                                              self.select_plate))
+
+    def create_select_menu(self, placeholder, names, custom_id, on_select):
+        # The catalog is far past Discord's 25-option limit, so it is paged
+        return PagedSelect(placeholder, names, custom_id, on_select)
+
+    async def interaction_check(self, interaction) -> bool:
+        # Purchases spend the shop owner's balance
+        return interaction.user.id == self.user_id
+
+    async def roll(self, count):
+        """Draw ``count`` pulls from the active banner, honouring the user's pity counter."""
+        banner = self.engine.active_banner
+        pity_count = await self.db.get_pity(self.user_id, banner.name)
+        pulls, since_top = banner.pull(count, pity_count, self.engine.rng)
+        return pulls, (banner.name, count, since_top)
+
+    async def paid_roll(self, interaction, count, cost):
+        pulls, pity = await self.roll(count)
+        new_crystal_count = await self.db.spend_crystals(self.user_id, cost, [pokemon for pokemon, _ in pulls], pity)
+        if new_crystal_count is None:
+            await interaction.response.send_message("Not enough crystals.", ephemeral=True)
+            return
+        self.current_crystals = new_crystal_count
 
-        self.add_roll_buttons()
+        await interaction.response.send_message(f"You've got the following Pokémon: {summarise_pulls(pulls)}",
+                                                ephemeral=True)
 
-    def create_select_menu(self, placeholder, data, custom_id):
-        options = [SelectOption(label=item['name'], value=item['name']) for item in data]
-        return Select(placeholder=placeholder, options=options, custom_id=custom_id)
+    async def add_to_inventory(self, item):
+        await self.db.add_to_inventory(self.user_id, item)
 
-    def add_roll_buttons(self):
-        self.add_item(Button(label='Single Roll (50 Crystals)', style=ButtonStyle.primary, custom_id='single_roll', emoji='🎲'))
-        self.add_item(Button(label='Multi Roll (10x for 500 Crystals)', style=ButtonStyle.primary, custom_id='multi_roll', emoji='🎰'))
-        self.add_item(Button(label='Flash Sale!', style=ButtonStyle.danger, custom_id='flash_sale', emoji='⚡'))
+    def generate_flash_sale_pokemon(self):
+        names = self.engine.flash_sale_pokemon or self.engine.rotate_flash_sale()
+        self.flash_sale_pokemon = [self.registry[name] for name in names]
 
-    def roll(self):
-        rolled_pokemon = random.choice(self.shop_data)
-        return rolled_pokemon['name'], rolled_pokemon['rarity']
+    async def select_pokemon(self, interaction, selected_pokemon):
+        selected_rarity = self.registry[selected_pokemon]['Rarity']
 
-    def add_to_inventory(self, item, rarity):
-        self.db.add_to_inventory(self.user_id, item, rarity)
+        dust_cost = DUST_COSTS.get(selected_rarity, 0)
+        if selected_pokemon in self.engine.flash_sale_pokemon:
+            dust_cost //= 2
 
-    def generate_flash_sale_pokemon(self):
-        self.shop_data = self.load_pokemon_data()
-        ex_ux_pokemon = [pokemon for pokemon in self.shop_data if pokemon['rarity'] in ['EX', 'UX']]
-        other_pokemon = [pokemon for pokemon in self.shop_data if pokemon['rarity'] not in ['EX', 'UX']]
-
-        self.flash_sale_pokemon = random.sample(ex_ux_pokemon, 1) + random.sample(other_pokemon, 1)
-
-    @Select(placeholder='Select a Pokémon to buy with dust', options=self.pokemon_options)
-    async def select_pokemon(self, select, interaction):
-        selected_pokemon = select.values[0]
-        selected_rarity = next(item for item in self.shop_data if item["name"] == selected_pokemon)["rarity"]
-
-        dust_cost = 0
-        if selected_rarity == 'UX' or selected_rarity == 'EX':
-            dust_cost = 5000
-        elif selected_rarity == 'R':
-            dust_cost = 2000
-        elif selected_rarity == 'UC':
-            dust_cost = 1000
-        elif selected_rarity == 'C':
-            dust_cost = 500
-
-        self.current_dust = self.db.get_dust(self.user_id)
-        if self.current_dust < dust_cost:
+        new_dust = await self.db.spend_dust(self.user_id, dust_cost, [selected_pokemon])
+        if new_dust is None:
             await interaction.response.send_message("Not enough dust.", ephemeral=True)
             return
-
-        self.add_to_inventory(self.user_id, selected_pokemon, selected_rarity)
-
-        self.db.update_dust(self.user_id, self.current_dust - dust_cost)
+        self.current_dust = new_dust
 
         await interaction.response.send_message(f"You've bought a {selected_pokemon}!", ephemeral=True)
 
-    @Select(placeholder='Select a Plate to buy with dust', options=self.plate_options)
-    async def select_plate(self, select, interaction):
-        selected_plate = select.values[0]
-        plate_cost = next(item for item in self.plates_data if item["name"] == selected_plate)["cost"]
+    async def select_plate(self, interaction, selected_plate):
+        plate_cost = self.registry.get_plate(selected_plate)['Cost']
 
-        self.current_dust = self.db.get_dust(self.user_id)
-        if self.current_dust < plate_cost:
+        new_dust = await self.db.spend_dust(self.user_id, plate_cost, [selected_plate])
+        if new_dust is None:
             await interaction.response.send_message("Not enough dust.", ephemeral=True)
             return
-
-        self.db.add_plate_to_inventory(self.user_id, selected_plate)
-        self.db.update_dust(self.user_id, self.current_dust - plate_cost)
+        self.current_dust = new_dust
 
         await interaction.response.send_message(f"You've bought a {selected_plate} for {plate_cost} dust!",
                                                 ephemeral=True)
 
-    @Button(label='Single Roll (50 Crystals)', style=ButtonStyle.primary, custom_id='single_roll', emoji='🎲')
-    async def single_roll(self, button, interaction):
-        self.current_crystals = self.db.get_crystals(self.user_id)
-        if self.current_crystals < 50:
+    @button(label='Single Roll (50 Crystals)', style=ButtonStyle.primary, custom_id='single_roll', emoji='🎲')
+    async def single_roll(self, interaction, button):
+        pulls, pity = await self.roll(1)
+        pokemon, rarity = pulls[0]
+        new_crystal_count = await self.db.spend_crystals(self.user_id, SINGLE_ROLL_COST, [pokemon], pity)
+        if new_crystal_count is None:
             await interaction.response.send_message("Not enough crystals.", ephemeral=True)
             return
-        new_crystal_count = self.current_crystals - 50
-
-        self.db.update_crystals(self.user_id, new_crystal_count)
-
-        pokemon, rarity = self.roll(self.user_id)
-        self.add_to_inventory(self.user_id, pokemon, rarity)
+        self.current_crystals = new_crystal_count
 
         await interaction.response.send_message(f"You've got a {pokemon} of rarity {rarity}!", ephemeral=True)
 
-    @Button(label='Multi Roll (10x for 500 Crystals)', style=ButtonStyle.primary, custom_id='multi_roll', emoji='🎰')
-    async def multi_roll(self, button, interaction):
-        current_crystals = self.db.get_crystals(self.user_id)
-        if current_crystals < 500:
-            await interaction.response.send_message("Not enough crystals.", ephemeral=True)
-            return
-        new_crystal_count = current_crystals - 500
-        self.db.update_crystals(self.user_id, new_crystal_count)
-
-        rolls = []
-        for _ in range(10):
-            pokemon, rarity = self.roll(self.user_id)
-            self.add_to_inventory(self.user_id, pokemon, rarity)
-            rolls.append(f"{pokemon} ({rarity})")
+    @button(label='Multi Roll (10x for 500 Crystals)', style=ButtonStyle.primary, custom_id='multi_roll', emoji='🎰')
+    async def multi_roll(self, interaction, button):
+        await self.paid_roll(interaction, 10, MULTI_ROLL_COST)
 
-        await interaction.response.send_message(f"You've got the following Pokémon: {', '.join(rolls)}", ephemeral=True)
+    @button(label='Bulk Roll (100x for 5000 Crystals)', style=ButtonStyle.primary, custom_id='bulk_roll', emoji='💎')
+    async def bulk_roll(self, interaction, button):
+        await self.paid_roll(interaction, BULK_ROLL_COUNT, BULK_ROLL_COST)
 
-    @Button(label='Flash Sale!', style=ButtonStyle.danger, custom_id='flash_sale', emoji='⚡')
-    async def flash_sale(self, button, interaction):
+    @button(label='Flash Sale!', style=ButtonStyle.danger, custom_id='flash_sale', emoji='⚡')
+    async def flash_sale(self, interaction, button):
         self.generate_flash_sale_pokemon()
         flash_sale_msg = "Flash sale is live! The following Pokémon are available at half-off dust prices:\n"
-        flash_sale_msg += "\n".join([f"{pokemon['name']} ({pokemon['rarity']})" for pokemon in self.flash_sale_pokemon])
+        flash_sale_msg += "\n".join([f"{pokemon['Name']} ({pokemon['Rarity']})" for pokemon in self.flash_sale_pokemon])
         await interaction.response.send_message(flash_sale_msg, ephemeral=True)
\ No newline at end of file
@@ -1,170 +1,247 @@
-from datetime import datetime
-import random
-from pokeduel.utils.board import BoardManager
-from pokeduel.logic.combat import CombatManager
+import json
+import logging
+from uuid import uuid4
+from pokeduel.utils.board import BoardManager, BoardVisualizer
+from pokeduel.utils.bitboard import cell_coords
+from pokeduel.logic.duel import DuelSession
 from discord import ButtonStyle
 from discord.ui import View, Button
-from pokeduel.party import PartyButtonView, DatabaseManager
+from pokeduel.party import PartyButtonView
+from pokeduel.data.registry import get_registry
+from pokeduel.utils.constants import SNAPSHOT_INTERVAL, TURN_TIMEOUT
 
-class GameButtons(View):
-    def __init__(self):
-        super().__init__()
-        self.add_item(Button(style=ButtonStyle.primary, label="Move", custom_id="move"))
-        self.add_item(Button(style=ButtonStyle.primary, label="Battle", custom_id="battle"))
-        self.add_item(Button(style=ButtonStyle.primary, label="End Turn", custom_id="end_turn"))
+log = logging.getLogger("red.pokeduel.ingame")
 
 
-class MoveButtons(View):
-    def __init__(self, board_manager, current_piece_coords, movement_range):
-        super().__init__()
-        self.board_manager = board_manager
-        self.current_piece_coords = current_piece_coords
-        self.movement_range = movement_range
+CUSTOM_ID_PREFIX = 'pokeduel'
+MAX_BUTTONS = 25
+VERB_LABELS = {'end_turn': "End Turn", 'cancel': "Back"}
 
-        for direction, label in self.valid_movements():
-            self.add_item(Button(style=ButtonStyle.secondary, label=label, custom_id=direction))
 
-    def valid_movements(self):
-        valid_moves = []
-        x, y = self.current_piece_coords
+def encode_custom_id(game_id, action):
+    return ':'.join((CUSTOM_ID_PREFIX, game_id, *map(str, action)))
 
-        # Example: Add adjacent cells for a movement range of 1
-        if self.movement_range == 1:
-            adjacent_cells = [(x+1, y), (x-1, y), (x, y+1), (x, y-1)]
-            for new_x, new_y in adjacent_cells:
-                if self.board_manager.is_valid_cell(new_x, new_y):
-                    direction = f"{new_x},{new_y}"
-                    label = f"Move to ({new_x}, {new_y})"
-                    valid_moves.append((direction, label))
-        # TODO: Add logic for other movement ranges
 
-        return valid_moves
+def decode_custom_id(custom_id):
+    """Return ``(game_id, action)`` for a duel button's custom_id, or None for anything else."""
+    parts = custom_id.split(':')
+    if len(parts) < 3 or parts[0] != CUSTOM_ID_PREFIX:
+        return None
+    try:
+        return parts[1], (parts[2], *map(int, parts[3:]))
+    except ValueError:
+        return None
+
+
+def action_label(session, action):
+    verb = action[0]
+    if verb == 'enter':
+        return f"Send out {session.bench[session.turn][action[1]]} at {cell_coords(action[2])}"
+    if verb == 'select':
+        return f"Move {session.pieces.pieces[action[1]]} {cell_coords(action[1])}"
+    if verb == 'move':
+        return f"Move to {cell_coords(action[1])}"
+    if verb == 'battle':
+        return f"{session.pieces.pieces[action[1]]} attacks {session.pieces.pieces[action[2]]}"
+    return VERB_LABELS[verb]
+
+
+class DuelView(View):
+    """Buttons for the current player's legal actions.
+
+    Clicks are not handled here: each custom_id names its game and action,
+    and the cog's single ``on_interaction`` listener routes it to the session.
+    """
+
+    def __init__(self, session):
+        super().__init__(timeout=None)
+        actions = session.legal_actions()
+        if len(actions) > MAX_BUTTONS:
+            # The closing action (end turn / back) is always last and always kept
+            actions = actions[:MAX_BUTTONS - 1] + actions[-1:]
+        for action in actions:
+            style = ButtonStyle.secondary if action[0] in VERB_LABELS else ButtonStyle.primary
+            self.add_item(Button(style=style, label=action_label(session, action),
+                                 custom_id=encode_custom_id(session.game_id, action)))
+        # A stopped view still renders its buttons but is never kept in the bot's view store,
+        # so an open duel costs nothing between clicks
+        self.stop()
 
 
 class GameManager:
-    def __init__(self, bot, db_path):
+    def __init__(self, bot, db, board_manager=None, scheduler=None):
         self.bot = bot
-        self.db = DatabaseManager(db_path)
-        self.board_manager = BoardManager()
-        self.combat_manager = CombatManager()
+        self.db = db
+        self.board_manager = board_manager or BoardManager()
+        self.scheduler = scheduler
         self.ongoing_games = {}
+        self.player_games = {}
+        self.channels = {}
+        self.turn_timers = {}
+        # Journal rows of the turn in progress, written together when the turn ends
+        self.journal = {}
 
-    async def start_duel(self, ctx, player1, player2):
-        game_id = self.create_game_id(player1, player2)
-        self.setup_game(game_id, player1.id, player2.id)
-        await self.game_loop(ctx, game_id)
-
-    def create_game_id(self, player1, player2):
-        timestamp_duel = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        return f"{player1.id} vs. {player2.id} {timestamp_duel}"
-
-    def setup_game(self, game_id, player1_id, player2_id):
-        starting_player = random.choice([player1_id, player2_id])
-        player1_party = self.db.get_user_party(player1_id)
-        player2_party = self.db.get_user_party(player2_id)
-        self.ongoing_games[game_id] = {
-            'turn': starting_player,
-            'player1': {'board': self.board_manager.setup_initial_board(player1_party), 'party': player1_party},
-            'player2': {'board': self.board_manager.setup_initial_board(player2_party), 'party': player2_party},
-            'turn_counter': 0
-        }
-
-    async def game_loop(self, ctx, game_id):
-        while True:
-            game = self.ongoing_games[game_id]
-            current_player_id = game['turn']
-            opponent_id = self.get_opponent_id(game_id, current_player_id)
-
-            await self.perform_turn_actions(ctx, game_id, current_player_id)
-
-            if self.check_win_condition(game_id, current_player_id):
-                await self.end_game(ctx, game_id, current_player_id)
-                break
-
-            self.switch_turn(game_id)
-
-    def get_opponent_id(self, game_id, current_player_id):
-        game = self.ongoing_games[game_id]
-        return game['player2']['id'] if game['player1']['id'] == current_player_id else game['player1']['id']
-
-    async def perform_turn_actions(self, ctx, game_id, current_player_id):
-        await self.display_boards(ctx, game_id, current_player_id)
-        game_buttons = GameButtons()
-        await ctx.send("Choose an action:", view=game_buttons)
-
-        interaction = await self.bot.wait_for('button_click', check=lambda i: i.user.id == current_player_id)
-        if interaction.custom_id == 'move':
-            await self.handle_move(ctx, game_id, current_player_id, interaction)
-        elif interaction.custom_id == 'battle':
-            await self.handle_battle(ctx, game_id, current_player_id, interaction)
-        elif interaction.custom_id == 'end_turn':
-            self.handle_end_of_turn(ctx, game_id, current_player_id)
-
-    def handle_end_of_turn(self, ctx, game_id, current_player_id):
-        self.handle_special_features(game_id, current_player_id)
-        self.switch_turn(game_id)
-
-    # Implement end turn logic
-
-    # End turn logic
-
-    def switch_turn(self, game_id):
-        current_game = self.ongoing_games[game_id]
-        current_player_id = current_game['turn']
-        current_game['turn'] = current_game['player2']['id'] if current_game['player1']['id'] == current_player_id else current_game['player1']['id']
-        current_game['turn_counter'] += 1
-
-
-
-    # New method for handling special game features (status, evolution, Z-Moves)
-    def handle_special_features(self, game_id, current_player_id):
-        current_game = self.ongoing_games[game_id]
-        current_board = current_game[f'player{current_player_id}']['board']
-        # Implement logic for evolutions, Mega Evolutions, Z-Moves, and status conditions
-        # ...
-
-    def check_win_condition(self, game_id, current_player_id):
-        current_game = self.ongoing_games[game_id]
-        opponent_id = self.get_opponent_id(game_id, current_player_id)
-        if self.has_reached_goal(current_game[f'player{opponent_id}']['board']):
-            return True
-        return False
+    def create_game_id(self):
+        return uuid4().hex
 
-    async def end_game(self, ctx, game_id, winning_player_id):
-        await ctx.send(f"Game over! {ctx.guild.get_member(winning_player_id).mention} won the game!")
-        del self.ongoing_games[game_id]
+    def is_in_duel(self, player_id):
+        return player_id in self.player_games
 
-    def get_movement_range(self, piece):
-        return self.pokemon_data.get(piece, {}).get('Movement', 1)
-
-    async def end_of_turn_phase(self, ctx, game_id, player1, player2):
-        game = self.ongoing_games.get(game_id)
-        if game is None:
-            return
+    async def start_duel(self, ctx, player1, player2):
+        registry = get_registry()
+        parties = []
+        for player in (player1, player2):
+            party = await self.db.get_user_party(player.id)
+            parties.append([name for name in party if name in registry])
+
+        # The session seeds its own generator; stored with the setup, it lets the duel be replayed exactly
+        session = DuelSession(self.create_game_id(), (player1.id, player2.id), parties)
+        channel = getattr(ctx, 'channel', ctx)
+        setup = json.dumps({'players': list(session.players), 'parties': parties})
+        await self.db.create_duel(session.game_id, channel.id, session.seed, setup, self.snapshot(session))
+        self.register(session, channel)
+
+        await ctx.send(f"{player1.mention} vs. {player2.mention}! {self.status_line(session)}",
+                       view=DuelView(session), file=BoardVisualizer(session).render_file())
+        return session
+
+    def register(self, session, channel):
+        self.ongoing_games[session.game_id] = session
+        self.channels[session.game_id] = channel
+        for player_id in session.players:
+            self.player_games[player_id] = session.game_id
+        self.arm_turn_timer(session)
+
+    def snapshot(self, session):
+        # Serialised here rather than on the writer thread, since the session keeps changing meanwhile
+        return session.sequence, json.dumps(session.snapshot(), separators=(',', ':'))
+
+    def journal_action(self, session, action):
+        self.journal.setdefault(session.game_id, []).append((session.sequence, json.dumps(action)))
+
+    async def flush_journal(self, session):
+        """Write the buffered turn to the journal, with a fresh snapshot every ``SNAPSHOT_INTERVAL`` turns."""
+        actions = self.journal.pop(session.game_id, [])
+        snapshot = None
+        if not session.finished and session.turn_counter % SNAPSHOT_INTERVAL == 0:
+            snapshot = self.snapshot(session)
+        await self.db.record_duel_turn(session.game_id, actions, snapshot, session.finished, session.winner)
+
+    async def restore_duels(self):
+        """Reload every unfinished duel from its last snapshot plus the journal written since.
+
+        Inputs of a turn that never finished were not journaled, so a restored
+        duel resumes at the start of its current player's turn.
+        """
+        restored = []
+        for channel_id, snapshot, actions in await self.db.get_open_duels():
+            try:
+                session = DuelSession.restore(snapshot)
+                for action in actions:
+                    session.replay(action)
+            except (KeyError, ValueError):
+                log.exception("Could not restore duel %s", snapshot.get('game_id'))
+                continue
+            if session.finished:
+                # Its finish was journaled but never recorded; record it so it isn't reloaded every startup
+                await self.db.record_duel_turn(session.game_id, [], None, True, session.winner)
+                continue
+            channel = self.bot.get_channel(channel_id)
+            self.register(session, channel)
+            restored.append(session)
+            if channel is not None:
+                await channel.send(f"The duel has been resumed. {self.status_line(session)}",
+                                   view=DuelView(session), file=BoardVisualizer(session).render_file())
+        return restored
+
+    def status_line(self, session):
+        if session.finished:
+            if session.winner is None:
+                return "The duel ended in a draw."
+            return f"<@{session.players[session.winner]}> won the duel!"
+        return f"Turn {session.turn_counter + 1}: <@{session.current_player}> to play."
+
+    async def handle_interaction(self, interaction):
+        """Route a duel button click to its session. Returns False if the click isn't a duel button."""
+        decoded = decode_custom_id((interaction.data or {}).get('custom_id', ''))
+        if decoded is None:
+            return False
+        game_id, action = decoded
+
+        session = self.ongoing_games.get(game_id)
+        if session is None:
+            await interaction.response.send_message("This duel is no longer running.", ephemeral=True)
+            return True
+        if interaction.user.id != session.current_player:
+            await interaction.response.send_message("It's not your turn.", ephemeral=True)
+            return True
+        turn_counter = session.turn_counter
+        try:
+            events = session.apply(action)
+        except ValueError:
+            await interaction.response.send_message("That option is no longer available.", ephemeral=True)
+            return True
 
-        game['turn_counter'] += 1
+        self.journal_action(session, action)
 
-        # Check for turn limit (300 turns)
-        if game['turn_counter'] >= 300:
-            await ctx.send("Game over! Turn limit reached.")
+        turn_over = session.finished or session.turn_counter != turn_counter
+        if session.finished:
             self.end_game(game_id)
+        elif turn_over:
+            self.arm_turn_timer(session)
+        try:
+            await self.send_update(interaction, session, events)
+        finally:
+            # Persisted once the player already has their response (or it failed), one transaction per turn
+            if turn_over:
+                await self.flush_journal(session)
+        return True
+
+    def arm_turn_timer(self, session):
+        """(Re)start the current turn's timeout; a player who lets it run out forfeits."""
+        if self.scheduler is None:
             return
+        self.scheduler.cancel(self.turn_timers.get(session.game_id))
+        self.turn_timers[session.game_id] = self.scheduler.schedule(
+            TURN_TIMEOUT, self.expire_turn, session.game_id, session.turn_counter)
 
-        # Check for win condition
-        if await self.check_win_condition(game['board'], discord.Member(id=game['turn'])):
-            await ctx.send(f"{discord.Member(id=game['turn']).mention} won the game!")
-            self.end_game(game_id)
+    async def expire_turn(self, game_id, turn_counter):
+        session = self.ongoing_games.get(game_id)
+        if session is None or session.turn_counter != turn_counter:
             return
-
-        # TODO: Add any other end-of-turn effects or checks here
-
-        game['turn'] = player2.id if game['turn'] == player1.id else player1.id
-        await ctx.send(f"It's now {discord.Member(id=game['turn']).mention}'s turn!")
-
-    async def check_win_condition(self, opponent_board, current_player):
-        if opponent_board[4][3] in current_player.pokemons:
-            return True
-        return False
+        timed_out, slot = session.current_player, session.turn
+        events = session.forfeit(slot)
+        # Journaled like any input, so restores and replays reach the same result
+        self.journal_action(session, ('forfeit', slot))
+        channel = self.channels.get(game_id)
+        self.end_game(game_id)
+        try:
+            if channel is not None:
+                await channel.send("\n".join([f"<@{timed_out}> ran out of time.", *events, self.status_line(session)]))
+        finally:
+            await self.flush_journal(session)
+
+    async def send_update(self, interaction, session, events):
+        content = "\n".join([*events, self.status_line(session)])
+        if session.finished:
+            await interaction.response.send_message(content, file=BoardVisualizer(session).render_file())
+        elif events:
+            await interaction.response.send_message(content, view=DuelView(session),
+                                                    file=BoardVisualizer(session).render_file())
+        else:
+            # Selecting a piece or going back changes only the options, not the board
+            await interaction.response.send_message(content, view=DuelView(session), ephemeral=True)
 
     def end_game(self, game_id):
-        del self.ongoing_games[game_id]
+        session = self.ongoing_games.pop(game_id, None)
+        self.channels.pop(game_id, None)
+        if self.scheduler is not None:
+            self.scheduler.cancel(self.turn_timers.pop(game_id, None))
+        if session is not None:
+            for player_id in session.players:
+                if self.player_games.get(player_id) == game_id:
+                    del self.player_games[player_id]
+        return session
+
+    def get_movement_range(self, piece):
+        return get_registry().get(piece, {}).get('Movement', 1)
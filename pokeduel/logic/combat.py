@@ -1,14 +1,58 @@
 
 import random
 
+from pokeduel.logic.wheel import (MISS_SEGMENT, WheelTable, build_wheel_tables, move_colour, overlay_move,
+                                  reapply_overlays, split_overlays)
+from pokeduel.utils.cache import LRUCache
+
+PLAYERS = ('Player 1', 'Player 2')
+
+
+class CombatState:
+    """Combat modifiers for a single duel, keyed by ``'Player 1'`` / ``'Player 2'``.
+
+    Each game session owns one, so concurrent duels never see each other's
+    plates or evolutions, and everything is freed with the session.
+    """
+
+    __slots__ = ('plates', 'damage_boosts', 'ability_negations', 'evolutions', 'move_bonuses', 'mega_evolution')
+
+    def __init__(self):
+        self.plates = {}
+        self.damage_boosts = {}
+        self.ability_negations = {}
+        self.evolutions = {}
+        # (player, species) -> {'Damage': ..., 'Stars': ...} earned by evolving, overlaid on every spin
+        self.move_bonuses = {}
+        self.mega_evolution = {player: {'active': False, 'turns_left': 0} for player in PLAYERS}
+
+    def to_dict(self):
+        """Return the state as JSON-serialisable data, with evolutions stored by species name."""
+        return {
+            'plates': [[plate_id, plate] for plate_id, plate in self.plates.items()],
+            'damage_boosts': self.damage_boosts,
+            'ability_negations': self.ability_negations,
+            'evolutions': {player: pokemon['Name'] for player, pokemon in self.evolutions.items()},
+            'move_bonuses': [[player, species, bonus] for (player, species), bonus in self.move_bonuses.items()],
+            'mega_evolution': self.mega_evolution,
+        }
+
+    @classmethod
+    def from_dict(cls, data, pokemon_data):
+        state = cls()
+        state.plates = {plate_id: plate for plate_id, plate in data['plates']}
+        state.damage_boosts = data['damage_boosts']
+        state.ability_negations = data['ability_negations']
+        state.evolutions = {player: pokemon_data[name] for player, name in data['evolutions'].items()}
+        state.move_bonuses = {(player, species): bonus for player, species, bonus in data['move_bonuses']}
+        state.mega_evolution = data['mega_evolution']
+        return state
+
+
 class CombatManager:
-    active_damage_boosts = {}
-    active_ability_negations = {}
-    mega_evolutions = {}
-    active_plates = {}
-    active_evolutions = {}
-    mega_evolution_data = {'Player 1': {'active': False, 'turns_left': 0},
-                           'Player 2': {'active': False, 'turns_left': 0}}
+    wheel_tables = {}
+    # Keyed by species pair and modifiers, so bounded: long-running bots and simulations visit many pairs
+    matchup_cache = LRUCache(16384)
 
     @staticmethod
     def calculate_probabilities(base_wheel):
@@ -19,15 +63,32 @@ class CombatManager:
         return probabilities
 
     @staticmethod
-    def spin_wheel(pokemon):
-        wheel = []
-        for move in pokemon['Base Wheel Size']:
-            wheel.extend([move['Name']] * move['Size'])
-        return random.choice(wheel)
+    def load_wheel_tables(pokemon_data):
+        CombatManager.wheel_tables = build_wheel_tables(pokemon_data)
+        CombatManager.matchup_cache.clear()
+
+    @staticmethod
+    def wheel_for(pokemon):
+        table = CombatManager.wheel_tables.get(pokemon.get('Name'))
+        if table is None:
+            # Records outside the loaded catalog still spin, they just aren't cached
+            table = WheelTable.from_pokemon(pokemon)
+        return table
+
+    @staticmethod
+    def spin_move(pokemon, rng=random):
+        table = CombatManager.wheel_for(pokemon)
+        # Species without a wheel can't land anything
+        return table.spin(rng) if table.total else MISS_SEGMENT
+
+    @staticmethod
+    def spin_wheel(pokemon, rng=random):
+        return CombatManager.spin_move(pokemon, rng)['Name']
 
     @staticmethod
     def determine_outcome(move1, move2):
-        type1, type2 = move1['Move Type'], move2['Move Type']
+        # Rules are by colour, so Z-Moves ('White Z-Move', ...) battle as their base colour
+        type1, type2 = move_colour(move1), move_colour(move2)
 
         # handle Blue moves
         if type1 == 'Blue':
@@ -82,7 +143,45 @@ class CombatManager:
 
         return 'No applicable rule'
 
-    def apply_effects(self, outcome, move1, move2):
+    @staticmethod
+    def calculate_matchup(pokemon1, pokemon2, status1=None, status2=None, damage_boost1=0, damage_boost2=0):
+        """Return the exact odds of a single battle between two Pokémon.
+
+        Every pair of wheel segments is resolved through ``determine_outcome``
+        and weighted by segment size, so the result is exact rather than sampled.
+        Pairs with no applicable rule count as a draw. Results for catalog
+        species are cached per (species, species, modifiers).
+        """
+        key = (pokemon1.get('Name'), pokemon2.get('Name'), status1, status2, damage_boost1, damage_boost2)
+        cached = CombatManager.matchup_cache.get(key)
+        if cached is not None:
+            return dict(cached)
+
+        segments1 = CombatManager.wheel_for(pokemon1).effective_segments(status1, damage_boost1)
+        segments2 = CombatManager.wheel_for(pokemon2).effective_segments(status2, damage_boost2)
+        probabilities = CombatManager.resolve_segments(segments1, segments2)
+        if key[0] is not None and key[1] is not None:
+            CombatManager.matchup_cache.put(key, probabilities)
+        return dict(probabilities)
+
+    @staticmethod
+    def resolve_segments(segments1, segments2):
+        """Return outcome probabilities for two lists of ``(weight, segment)`` pairs."""
+        if not segments1 or not segments2:
+            raise ValueError("Both Pokémon need a non-empty wheel to battle.")
+
+        counts = {'Player 1 Wins': 0, 'Player 2 Wins': 0, 'Draw': 0}
+        for weight1, move1 in segments1:
+            for weight2, move2 in segments2:
+                result = CombatManager.determine_outcome(move1, move2)
+                outcome = result[0] if isinstance(result, tuple) else 'Draw'
+                counts[outcome] += weight1 * weight2
+
+        total = sum(counts.values())
+        return {outcome: count / total for outcome, count in counts.items()}
+
+    @staticmethod
+    def apply_effects(outcome, move1, move2):
         if outcome == "Player 1 Wins" and move1.get('Additional Notes'):
             return f"Player 1's Pokemon applies {move1['Additional Notes']}"
         elif outcome == "Player 2 Wins" and move2.get('Additional Notes'):
@@ -91,58 +190,67 @@ class CombatManager:
             return "No additional effects applied"
 
     @staticmethod
-    def use_support_cards(player, plate):
+    def use_support_cards(state, player, plate):
         plate_id = plate["ID"]
         plate_effect = plate["Effect"]
         plate_name = plate["Name"]
 
-        if plate_id in CombatManager.active_plates:
+        if plate_id in state.plates:
             return f"{plate_name} is already active."
 
-        CombatManager.active_plates[plate_id] = {
+        state.plates[plate_id] = {
             'player': player,
             'effect': plate_effect
         }
 
         if "deals +20 damage" in plate_effect:
-            CombatManager.apply_damage_boost(player, plate)
+            CombatManager.apply_damage_boost(state, player, plate)
         elif "Abilities of opposing Pokémon" in plate_effect:
-            CombatManager.apply_ability_negation(player, plate)
+            CombatManager.apply_ability_negation(state, player, plate)
         # TODO: more conditions
 
         return f"{player}'s plate {plate_name} is activated."
 
     @staticmethod
-    def apply_damage_boost(player, plate):
+    def apply_damage_boost(state, player, plate):
         pokemon_type = plate["Effect"].split("of your ")[1].split("-type")[0]
 
-        if player not in CombatManager.active_damage_boosts:
-            CombatManager.active_damage_boosts[player] = {}
+        if player not in state.damage_boosts:
+            state.damage_boosts[player] = {}
 
 
-        CombatManager.active_damage_boosts[player][pokemon_type] = 20  # Assuming a flat +20 boost
+        state.damage_boosts[player][pokemon_type] = 20  # Assuming a flat +20 boost
 
         return f"{player}'s {pokemon_type}-type Pokemon now deals +20 damage."
 
     @staticmethod
-    def apply_ability_negation(player, plate):
+    def apply_ability_negation(state, player, plate):
         pokemon_type = plate["Effect"].split("of your ")[1].split("-type")[0]
-        if player not in CombatManager.active_ability_negations:
-            CombatManager.active_ability_negations[player] = {}
-        CombatManager.active_ability_negations[player][pokemon_type] = True
+        if player not in state.ability_negations:
+            state.ability_negations[player] = {}
+        state.ability_negations[player][pokemon_type] = True
 
         return f"The abilities of {player}'s opponent's {pokemon_type}-type Pokemon with MP-reducing markers are now nullified."
 
     @staticmethod
-    def check_plate_effects(player, opponent, move):
-        player_boosts = CombatManager.active_damage_boosts.get(player, {})
-        opponent_negations = CombatManager.active_ability_negations.get(opponent, {})
+    def check_plate_effects(state, player, opponent, move):
+        player_boosts = state.damage_boosts.get(player, {})
+        opponent_negations = state.ability_negations.get(opponent, {})
+        changes = {}
         if move.get('Type') in player_boosts:
-            move['Damage'] += player_boosts[move.get('Type')]
+            changes['Damage'] = move['Damage'] + player_boosts[move.get('Type')]
         if move.get('Type') in opponent_negations:
-            move['Ability'] = None
+            changes['Ability'] = None
 
-        return move
+        return overlay_move(move, changes) if changes else move
+
+    @staticmethod
+    def apply_move_bonuses(state, player, pokemon, move):
+        bonus = state.move_bonuses.get((player, pokemon.get('Name')))
+        if not bonus:
+            return move
+        return overlay_move(move, {'Damage': move.get('Damage', 0) + bonus['Damage'],
+                                   'Stars': move.get('Stars', 0) + bonus['Stars']})
 
     @staticmethod
     def apply_status_effects(pokemon, move):
@@ -152,109 +260,132 @@ class CombatManager:
             move = CombatManager.get_next_wheel_move(move, pokemon)
 
         elif status == 'Poison':
-            move['Damage'] -= 20
+            move = overlay_move(move, {'Damage': move['Damage'] - 20})
 
         elif status == 'Noxious':
-            move['Damage'] -= 40
+            move = overlay_move(move, {'Damage': move['Damage'] - 40})
 
         elif status == 'Paralysis':
             move = CombatManager.convert_smallest_move_to_miss(move, pokemon)
 
         elif status == 'Sleep' or status == 'Frozen':
-            return {'Move Type': 'Miss', 'Name': 'N/A'}
+            # The same Red Miss the odds solvers use, so live battles and odds agree
+            return dict(MISS_SEGMENT)
 
         elif status == 'Burn':
             move = CombatManager.convert_smallest_move_to_miss(move, pokemon)
-            move['Damage'] -= 10
+            move = overlay_move(move, {'Damage': move['Damage'] - 10})
 
         elif status == 'Wait':
             return None  # No move can be performed
 
-        elif status == 'Curse':
-            return move
+        return move
+
+    @staticmethod
+    def wheel_index(move, pokemon):
+        """Return the position of ``move`` on ``pokemon``'s wheel, looking through overlays, or None."""
+        move = split_overlays(move)[1]
+        # By identity: segments with equal fields are still different parts of the wheel
+        for index, segment in enumerate(CombatManager.wheel_for(pokemon).moves):
+            if segment is move:
+                return index
+        return None
 
     @staticmethod
     def get_next_wheel_move(move, pokemon):
-        # Find the index of the current move
-        current_index = pokemon['Moves'].index(move)
-        # Move to the next index to simulate the confusion effect
-        next_index = (current_index + 1) % len(pokemon['Moves'])
-        # Return the 'next' move
-        return pokemon['Moves'][next_index]
+        index = CombatManager.wheel_index(move, pokemon)
+        if index is None:
+            return move
+        # Confusion resolves the segment after the one that was spun, with the same bonuses applied
+        moves = CombatManager.wheel_for(pokemon).moves
+        return reapply_overlays(move, moves[(index + 1) % len(moves)])
 
     @staticmethod
     def convert_smallest_move_to_miss(move, pokemon):
-        # Find the smallest move segment for Paralysis and Burn
-        if not pokemon['Moves']:
-            return move  # No move to convert if list is empty
-        smallest_move = min(pokemon['Moves'], key=lambda m: m.get('Size', float('inf')))
+        # Paralysis and Burn turn the single smallest segment (the first, on a tie) into a Miss
+        index = CombatManager.wheel_index(move, pokemon)
+        if index is None:
+            return move
+        moves = CombatManager.wheel_for(pokemon).moves
+        smallest = min(range(len(moves)), key=lambda position: moves[position]['Size'])
 
-        if smallest_move['Size'] == move['Size']:
-            # If the move to be converted is the one that was spun
-            smallest_move['Name'] = 'Miss'
-            smallest_move['Move Type'] = 'Red'
-            smallest_move['Damage'] = 0
-            smallest_move['Stars'] = 0
+        if index == smallest:
+            # The spun move is the smallest segment, so it misses this time only
+            return overlay_move(move, dict(MISS_SEGMENT))
 
-        return move if move['Name'] != smallest_move['Name'] else smallest_move
+        return move
 
     @staticmethod
-    def combat_calculation(pokemon1, pokemon2, plate1=None, plate2=None):
+    def combat_calculation(state, pokemon1, pokemon2, plate1=None, plate2=None, rng=random):
 
-        pokemon1 = CombatManager.active_evolutions.get('Player 1', pokemon1)
-        pokemon2 = CombatManager.active_evolutions.get('Player 2', pokemon2)
+        pokemon1 = state.evolutions.get('Player 1', pokemon1)
+        pokemon2 = state.evolutions.get('Player 2', pokemon2)
 
-        move1 = CombatManager.spin_wheel(pokemon1)
-        move2 = CombatManager.spin_wheel(pokemon2)
+        move1 = CombatManager.apply_move_bonuses(state, 'Player 1', pokemon1, CombatManager.spin_move(pokemon1, rng))
+        move2 = CombatManager.apply_move_bonuses(state, 'Player 2', pokemon2, CombatManager.spin_move(pokemon2, rng))
 
         if plate1:
-            move1 = CombatManager.check_plate_effects('Player 1', 'Player 2', move1)
+            move1 = CombatManager.check_plate_effects(state, 'Player 1', 'Player 2', move1)
         if plate2:
-            move2 = CombatManager.check_plate_effects('Player 2', 'Player 1', move2)
+            move2 = CombatManager.check_plate_effects(state, 'Player 2', 'Player 1', move2)
 
-        outcome, reason = CombatManager.determine_outcome(move1, move2)
+        result = CombatManager.determine_outcome(move1, move2)
+        # Pairs no rule covers come back as a bare string and count as a draw
+        outcome, reason = result if isinstance(result, tuple) else ('Draw', result)
 
         additional_effects = CombatManager.apply_effects(outcome, move1, move2)
 
         if outcome == 'Player 1 Wins':
-            CombatManager.evolve_pokemon('Player 1', pokemon1)
+            CombatManager.evolve_pokemon(state, 'Player 1', pokemon1)
         elif outcome == 'Player 2 Wins':
-            CombatManager.evolve_pokemon('Player 2', pokemon2)
+            CombatManager.evolve_pokemon(state, 'Player 2', pokemon2)
 
         return outcome, reason, additional_effects
 
     @staticmethod
-    def mega_evolve(player, pokemon):
-        if CombatManager.mega_evolution_data[player]['active']:
+    def combat_calculation_batch(pokemon1, pokemon2, battles, status1=None, status2=None,
+                                 damage_boost1=0, damage_boost2=0, rng=None):
+        """Simulate many battles between two Pokémon at once and return outcome counts.
+
+        Requires NumPy; ``rng`` is an optional ``numpy.random.Generator``.
+        """
+        from pokeduel.logic.simulation import simulate_battles
+
+        return simulate_battles(CombatManager.wheel_for(pokemon1), CombatManager.wheel_for(pokemon2), battles,
+                                CombatManager.determine_outcome, status1, status2,
+                                damage_boost1, damage_boost2, rng)
+
+    @staticmethod
+    def mega_evolve(state, player, pokemon):
+        if state.mega_evolution[player]['active']:
             return f"{player} has already used Mega Evolution."
-        CombatManager.mega_evolution_data[player]['active'] = True
-        CombatManager.mega_evolution_data[player]['turns_left'] = 7
+        state.mega_evolution[player]['active'] = True
+        state.mega_evolution[player]['turns_left'] = 7
 
         return f"{player}'s {pokemon['Name']} has Mega Evolved!"
 
     @staticmethod
-    def evolve_pokemon(player, pokemon):
+    def evolve_pokemon(state, player, pokemon):
 
         if not pokemon.get('Evolution'):
             return f"{pokemon['Name']} cannot evolve."
 
-        for move in pokemon['Evolution']['Base Wheel Size']:
-            move['Damage'] = move.get('Damage', 0) + 10
-            move['Stars'] = move.get('Stars', 0) + 1
-
         pokemon = pokemon['Evolution']
 
-        CombatManager.active_evolutions[player] = pokemon
+        bonus = state.move_bonuses.setdefault((player, pokemon['Name']), {'Damage': 0, 'Stars': 0})
+        bonus['Damage'] += 10
+        bonus['Stars'] += 1
+
+        state.evolutions[player] = pokemon
 
         return f"{player}'s {pokemon['Name']} has evolved!"
 
     @staticmethod
-    def multiple_spin_wheel(pokemon, num_spins=1):
-        outcomes = []
+    def multiple_spin_wheel(pokemon, num_spins=1, rng=random):
+        table = CombatManager.wheel_for(pokemon)
         outcome_counts = {}
         for _ in range(num_spins):
-            outcome = CombatManager.spin_wheel(pokemon)
-            outcomes.append(outcome)
+            outcome = table.spin(rng)['Name']
             outcome_counts[outcome] = outcome_counts.get(outcome, 0) + 1
 
         most_common = max(outcome_counts, key=outcome_counts.get)
@@ -273,17 +404,17 @@ class CombatManager:
         return ""
 
     @staticmethod
-    def use_support_cards(player, plate, all_pokemon):
+    def use_support_cards(state, player, plate, all_pokemon):
         plate_id = plate["ID"]
         plate_effect = plate.get("Effect")
         plate_name = plate["Name"]
 
         # Check if the plate is already active
-        if plate_id in CombatManager.active_plates:
+        if plate_id in state.plates:
             return f"{plate_name} is already active."
 
         # Activate the plate
-        CombatManager.active_plates[plate_id] = {'player': player, 'effect': plate_effect}
+        state.plates[plate_id] = {'player': player, 'effect': plate_effect}
 
         # Handle new plate effects
         if "heals all status conditions" in plate_effect:
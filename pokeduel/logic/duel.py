@@ -0,0 +1,291 @@
+import random
+import secrets
+
+from pokeduel.data.registry import get_registry
+from pokeduel.logic.combat import PLAYERS, CombatManager, CombatState
+from pokeduel.logic.movement import ADJACENCY, ReachabilityEngine, mask_cells
+from pokeduel.utils.bitboard import Bitboard, cell_coords, cell_index
+from pokeduel.utils.constants import TURN_LIMIT
+
+# Turn phases
+ACTION = 'action'
+DESTINATION = 'destination'
+BATTLE = 'battle'
+FINISHED = 'finished'
+
+# Per player slot: the spawn cells pieces enter through, and the goal the opponent has to reach
+SPAWNS = ((cell_index(0, 0), cell_index(0, 6)), (cell_index(7, 0), cell_index(7, 6)))
+GOALS = (cell_index(0, 3), cell_index(7, 3))
+
+
+def new_seed():
+    """Return a fresh duel seed; 63 bits so it fits SQLite's signed INTEGER."""
+    return secrets.randbits(63)
+
+
+class DuelSession:
+    """Rules and turn-phase state for one duel, with no Discord dependency.
+
+    Inputs are small tuples such as ``('select', cell)`` or ``('end_turn',)``.
+    ``legal_actions`` lists what the current player may send and ``apply``
+    advances the state machine and returns the events it produced. Forfeits
+    are not player input: only the server concedes for a player, through
+    ``forfeit``. A turn
+    runs ACTION (send out, select or attack) -> DESTINATION (where the
+    selected piece goes) -> BATTLE (optionally attack next to where it
+    landed) -> the opponent's ACTION. Nothing waits between inputs, so an
+    idle session is only this object.
+
+    Parameters:
+        game_id (str): Unique id, also carried in every button's custom_id.
+        players (tuple): The two players' user ids; their index is their slot.
+        parties (list): Each player's species names, all starting on the bench.
+        starting_slot (int): Slot that moves first, or None to draw it from the generator.
+        seed (int): Seed of the session's own generator, which draws the first player and every
+            wheel spin; a fresh one is picked when None. The same seed and inputs always replay
+            the same duel.
+        rng (random.Random): Generator to use instead of seeding one.
+    """
+
+    __slots__ = ('game_id', 'players', 'turn', 'phase', 'selected', 'turn_counter', 'sequence', 'pieces',
+                 'bench', 'knocked_out', 'combat', 'winner', 'seed', 'rng')
+
+    reachability = ReachabilityEngine()
+
+    def __init__(self, game_id, players, parties, starting_slot=None, seed=None, rng=None):
+        self.game_id = game_id
+        self.players = tuple(players)
+        if rng is None:
+            seed = new_seed() if seed is None else seed
+            rng = random.Random(seed)
+        self.seed = seed
+        self.rng = rng
+        self.turn = rng.randrange(2) if starting_slot is None else starting_slot
+        self.phase = ACTION
+        self.selected = None
+        self.turn_counter = 0
+        # Number of inputs applied so far, i.e. the session's position in its action journal
+        self.sequence = 0
+        self.pieces = Bitboard()
+        self.bench = [list(party) for party in parties]
+        self.knocked_out = [[], []]
+        self.combat = CombatState()
+        self.winner = None
+
+    @property
+    def current_player(self):
+        return self.players[self.turn]
+
+    @property
+    def position_hash(self):
+        return self.pieces.hash
+
+    @property
+    def finished(self):
+        return self.phase == FINISHED
+
+    def slot_of(self, player_id):
+        return self.players.index(player_id)
+
+    def cells_of(self, slot):
+        return [cell_index(*coords) for coords in mask_cells(self.pieces.owners[slot])]
+
+    def _reachable_mask(self, cell):
+        movement = get_registry().get(self.pieces.pieces[cell], {}).get('Movement', 1)
+        return self.reachability.reachable(cell, movement, self.pieces.occupied)
+
+    def _enemy_mask(self, cell):
+        return ADJACENCY[cell] & self.pieces.owners[1 - self.turn]
+
+    def _owns(self, cell):
+        return bool(self.pieces.owners[self.turn] >> cell & 1)
+
+    def destinations(self, cell):
+        return [cell_index(*coords) for coords in mask_cells(self._reachable_mask(cell))]
+
+    def adjacent_enemies(self, cell):
+        return [cell_index(*coords) for coords in mask_cells(self._enemy_mask(cell))]
+
+    def legal_actions(self):
+        if self.phase == FINISHED:
+            return []
+        if self.phase == DESTINATION:
+            return [('move', target) for target in self.destinations(self.selected)] + [('cancel',)]
+        if self.phase == BATTLE:
+            return [('battle', self.selected, target) for target in self.adjacent_enemies(self.selected)] + [('end_turn',)]
+
+        actions = []
+        seen = set()
+        for index, species in enumerate(self.bench[self.turn]):
+            if species in seen:
+                continue
+            seen.add(species)
+            actions.extend(('enter', index, spawn) for spawn in SPAWNS[self.turn] if self.pieces.is_empty(spawn))
+        for cell in self.cells_of(self.turn):
+            if self.destinations(cell):
+                actions.append(('select', cell))
+            actions.extend(('battle', cell, target) for target in self.adjacent_enemies(cell))
+        actions.append(('end_turn',))
+        return actions
+
+    def is_legal(self, action):
+        """Whether ``action`` is one of ``legal_actions()``, checked against the masks without listing them."""
+        try:
+            verb, *args = action
+            if self.phase == DESTINATION:
+                if verb == 'move':
+                    (target,) = args
+                    return bool(self._reachable_mask(self.selected) >> target & 1)
+                return verb == 'cancel' and not args
+            if self.phase == BATTLE:
+                if verb == 'battle':
+                    source, target = args
+                    return source == self.selected and bool(self._enemy_mask(source) >> target & 1)
+                return verb == 'end_turn' and not args
+            if self.phase == ACTION:
+                if verb == 'enter':
+                    index, spawn = args
+                    bench = self.bench[self.turn]
+                    # Duplicate species on the bench are only offered through their first copy
+                    return (0 <= index < len(bench) and bench.index(bench[index]) == index
+                            and spawn in SPAWNS[self.turn] and self.pieces.is_empty(spawn))
+                if verb == 'select':
+                    (cell,) = args
+                    return self._owns(cell) and bool(self._reachable_mask(cell))
+                if verb == 'battle':
+                    source, target = args
+                    return self._owns(source) and bool(self._enemy_mask(source) >> target & 1)
+                return verb == 'end_turn' and not args
+        except (TypeError, ValueError):
+            # Wrong arity, or a negative cell shifting a mask
+            return False
+        return False
+
+    def apply(self, action):
+        """Apply one input from the current player and return the resulting events."""
+        action = tuple(action)
+        if not self.is_legal(action):
+            raise ValueError(f"Illegal action {action!r} during the {self.phase} phase.")
+        self.sequence += 1
+
+        verb = action[0]
+        if verb == 'select':
+            self.selected, self.phase = action[1], DESTINATION
+            return []
+        if verb == 'cancel':
+            self.selected, self.phase = None, ACTION
+            return []
+        if verb == 'enter':
+            species = self.bench[self.turn].pop(action[1])
+            self.pieces.place(self.turn, species, action[2])
+            return [f"{species} enters the field at {cell_coords(action[2])}."] + self._after_move(action[2])
+        if verb == 'move':
+            species = self.pieces.pieces[self.selected]
+            self.pieces.move(self.selected, action[1])
+            return [f"{species} moves to {cell_coords(action[1])}."] + self._after_move(action[1])
+        if verb == 'battle':
+            return self._battle(action[1], action[2]) + self._end_turn()
+        return self._end_turn()
+
+    def forfeit(self, slot):
+        """Concede the duel for ``slot``, e.g. when its turn timer runs out."""
+        if self.finished:
+            raise ValueError("The duel is already over.")
+        self.sequence += 1
+        return self._finish(1 - slot, f"{PLAYERS[slot]} forfeits.")
+
+    def replay(self, action):
+        """Apply a journaled input, which may be a server-side ``('forfeit', slot)`` as well as player input."""
+        if action[0] == 'forfeit':
+            return self.forfeit(action[1])
+        return self.apply(action)
+
+    def snapshot(self):
+        """Return the whole session, RNG state included, as JSON-serialisable data."""
+        return {
+            'game_id': self.game_id,
+            'players': list(self.players),
+            'turn': self.turn,
+            'phase': self.phase,
+            'selected': self.selected,
+            'turn_counter': self.turn_counter,
+            'sequence': self.sequence,
+            'owners': self.pieces.owners,
+            'pieces': self.pieces.pieces,
+            'hash': self.pieces.hash,
+            'bench': self.bench,
+            'knocked_out': self.knocked_out,
+            'combat': self.combat.to_dict(),
+            'winner': self.winner,
+            'seed': self.seed,
+            'rng': self.rng.getstate(),
+        }
+
+    @classmethod
+    def restore(cls, data):
+        """Rebuild a session from ``snapshot`` data, e.g. after a JSON round trip."""
+        session = cls.__new__(cls)
+        session.game_id = data['game_id']
+        session.players = tuple(data['players'])
+        session.turn = data['turn']
+        session.phase = data['phase']
+        session.selected = data['selected']
+        session.turn_counter = data['turn_counter']
+        session.sequence = data['sequence']
+        session.pieces = Bitboard(data['owners'], data['pieces'], data['hash'])
+        session.bench = data['bench']
+        session.knocked_out = data['knocked_out']
+        session.combat = CombatState.from_dict(data['combat'], get_registry().pokemon)
+        session.winner = data['winner']
+        session.seed = data.get('seed')
+        version, internal_state, gauss_next = data['rng']
+        session.rng = random.Random()
+        session.rng.setstate((version, tuple(internal_state), gauss_next))
+        return session
+
+    def _after_move(self, cell):
+        if cell == GOALS[1 - self.turn]:
+            return self._finish(self.turn, f"{self.pieces.pieces[cell]} reached the goal!")
+        if self.adjacent_enemies(cell):
+            self.selected, self.phase = cell, BATTLE
+            return []
+        return self._end_turn()
+
+    def _spin(self, slot, species):
+        pokemon = get_registry().get(species) or {'Name': species}
+        move = CombatManager.spin_move(pokemon, self.rng)
+        return CombatManager.apply_move_bonuses(self.combat, PLAYERS[slot], pokemon, move)
+
+    def _battle(self, source, target):
+        cells = {self.turn: source, 1 - self.turn: target}
+        moves = [self._spin(slot, self.pieces.pieces[cells[slot]]) for slot in (0, 1)]
+        result = CombatManager.determine_outcome(moves[0], moves[1])
+        outcome = result[0] if isinstance(result, tuple) else 'Draw'
+
+        attacker, defender = self.pieces.pieces[source], self.pieces.pieces[target]
+        events = [f"{attacker} ({moves[self.turn]['Name']}) battles {defender} ({moves[1 - self.turn]['Name']})."]
+        if outcome == 'Draw':
+            return events + ["The battle is a draw."]
+        loser = 1 if outcome == 'Player 1 Wins' else 0
+        knocked_out = self.pieces.remove(cells[loser])
+        self.knocked_out[loser].append(knocked_out)
+        return events + [f"{knocked_out} is knocked out."]
+
+    def _end_turn(self):
+        self.selected = None
+        self.turn_counter += 1
+        # Mega Evolution lasts a number of its owner's turns, so it counts down here rather than on a clock
+        mega = self.combat.mega_evolution[PLAYERS[self.turn]]
+        if mega['turns_left']:
+            mega['turns_left'] -= 1
+        if self.turn_counter >= TURN_LIMIT:
+            return self._finish(None, "Turn limit reached, the duel is a draw.")
+        self.turn = 1 - self.turn
+        self.phase = ACTION
+        return []
+
+    def _finish(self, winner, reason):
+        self.selected = None
+        self.winner = winner
+        self.phase = FINISHED
+        return [reason]
@@ -0,0 +1,133 @@
+import random
+
+from pokeduel.utils.constants import DUST_COSTS, RARITY_WEIGHTS, PITY_THRESHOLD, RATE_UP_MULTIPLIER
+
+# Rarity tiers come from the shop's price list; the rarest are the ones pity guarantees
+RARITY_TIERS = tuple(DUST_COSTS)
+TOP_TIERS = ('EX', 'UX')
+
+
+class AliasTable:
+    """Walker/Vose alias table: O(n) to build, O(1) per weighted draw."""
+
+    __slots__ = ('outcomes', 'probability', 'alias')
+
+    def __init__(self, outcomes, weights):
+        if not outcomes:
+            raise ValueError("An alias table needs at least one outcome.")
+        count = len(outcomes)
+        total = sum(weights)
+        scaled = [weight * count / total for weight in weights]
+        self.outcomes = tuple(outcomes)
+        self.probability = [1.0] * count
+        self.alias = list(range(count))
+
+        small = [index for index, value in enumerate(scaled) if value < 1.0]
+        large = [index for index, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+
+    def draw(self, rng=random):
+        position = rng.random() * len(self.outcomes)
+        index = int(position)
+        if position - index < self.probability[index]:
+            return self.outcomes[index]
+        return self.outcomes[self.alias[index]]
+
+
+class Banner:
+    """Gacha odds for one banner: a rarity tier first, then a species within that tier.
+
+    Parameters:
+        name (str): Banner name, also the key for per-user pity counters.
+        names_by_rarity (Mapping): Rarity -> species names, e.g. from the species registry.
+        rate_up (dict): Optional species -> weight multiplier within its tier.
+    """
+
+    def __init__(self, name, names_by_rarity, rate_up=None):
+        self.name = name
+        self.rate_up = dict(rate_up or {})
+        tiers = [rarity for rarity in RARITY_TIERS if names_by_rarity.get(rarity)]
+        self.tiers = AliasTable(tiers, [RARITY_WEIGHTS[rarity] for rarity in tiers])
+        top_tiers = [rarity for rarity in tiers if rarity in TOP_TIERS]
+        self.pity_tiers = AliasTable(top_tiers, [RARITY_WEIGHTS[rarity] for rarity in top_tiers])
+        self.pools = {
+            rarity: AliasTable(names_by_rarity[rarity],
+                               [self.rate_up.get(name, 1) for name in names_by_rarity[rarity]])
+            for rarity in tiers
+        }
+
+    def draw(self, rng=random, pity=False):
+        rarity = (self.pity_tiers if pity else self.tiers).draw(rng)
+        return self.pools[rarity].draw(rng), rarity
+
+    def pull(self, count, pity_count=None, rng=random):
+        """Draw ``count`` results as ``(name, rarity)`` pairs.
+
+        ``pity_count`` is the number of pulls since the user's last EX/UX; once it
+        reaches ``PITY_THRESHOLD`` the next pull is drawn from the top tiers only.
+        Pass None to ignore pity entirely. Returns the pulls and the pity count
+        after the last top-tier pull in this batch, or None if there wasn't one.
+        """
+        pulls = []
+        since_top = None
+        for _ in range(count):
+            pity = pity_count is not None and pity_count >= PITY_THRESHOLD - 1
+            name, rarity = self.draw(rng, pity)
+            pulls.append((name, rarity))
+            if pity_count is not None:
+                pity_count = 0 if rarity in TOP_TIERS else pity_count + 1
+            if rarity in TOP_TIERS:
+                since_top = 0
+            elif since_top is not None:
+                since_top += 1
+        return pulls, since_top
+
+
+class GachaEngine:
+    """Holds the standard banner plus any rate-up banner built over the same registry.
+
+    Pulls and flash sales draw from the engine's own ``rng``, so a seeded
+    engine reproduces the same results.
+    """
+
+    STANDARD = 'standard'
+
+    def __init__(self, registry, seed=None):
+        self.registry = registry
+        self.rng = random.Random(seed)
+        self.banners = {self.STANDARD: Banner(self.STANDARD, registry.names_by_rarity)}
+        self.active_banner = self.banners[self.STANDARD]
+
+        names_by_rarity = registry.names_by_rarity
+        self.flash_sale_top = tuple(name for rarity in TOP_TIERS for name in names_by_rarity.get(rarity, ()))
+        self.flash_sale_other = tuple(name for rarity in RARITY_TIERS if rarity not in TOP_TIERS
+                                      for name in names_by_rarity.get(rarity, ()))
+        self.flash_sale_pokemon = ()
+
+    def start_rate_up(self, name, species, multiplier=RATE_UP_MULTIPLIER):
+        """Build a banner that boosts ``species`` within their tiers and make it active."""
+        unknown = [pokemon for pokemon in species if pokemon not in self.registry]
+        if unknown:
+            raise ValueError(f"Unknown Pokémon: {', '.join(unknown)}")
+        banner = Banner(name, self.registry.names_by_rarity, {pokemon: multiplier for pokemon in species})
+        self.banners[name] = banner
+        self.active_banner = banner
+        return banner
+
+    def end_rate_up(self):
+        self.active_banner = self.banners[self.STANDARD]
+
+    def flash_sale(self, rng=None):
+        """Pick one EX/UX and one other Pokémon for a flash sale."""
+        rng = self.rng if rng is None else rng
+        return [rng.choice(self.flash_sale_top), rng.choice(self.flash_sale_other)]
+
+    def rotate_flash_sale(self, rng=None):
+        """Start a new flash sale window, replacing the current one."""
+        self.flash_sale_pokemon = tuple(self.flash_sale(rng))
+        return self.flash_sale_pokemon
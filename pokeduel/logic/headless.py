@@ -0,0 +1,201 @@
+import argparse
+import random
+import time
+from functools import lru_cache
+
+from pokeduel.data.registry import get_registry
+from pokeduel.logic.combat import CombatManager
+from pokeduel.logic.duel import GOALS, DuelSession
+from pokeduel.logic.wheel import MISS_SEGMENT
+from pokeduel.utils.bitboard import cell_coords
+from pokeduel.utils.constants import MAX_PARTY_SIZE
+
+
+def goal_distance(cell, slot):
+    """Number of king steps from ``cell`` to the goal player ``slot`` has to reach."""
+    x, y = cell_coords(cell)
+    goal_x, goal_y = cell_coords(GOALS[1 - slot])
+    return max(abs(goal_x - x), abs(goal_y - y))
+
+
+@lru_cache(maxsize=16384)
+def engine_odds(first, second):
+    """Exact odds of a battle with ``first`` in slot 0 (Player 1) and ``second`` in slot 1.
+
+    Resolved exactly as ``DuelSession`` battles are: by ``determine_outcome`` in
+    slot order, which is not symmetric, with an empty wheel always missing.
+    """
+    registry = get_registry()
+    segments = [CombatManager.wheel_for(registry.get(name) or {'Name': name}).effective_segments()
+                or [(1, dict(MISS_SEGMENT))] for name in (first, second)]
+    return CombatManager.resolve_segments(*segments)
+
+
+class RandomPolicy:
+    """Picks uniformly among the legal actions."""
+
+    def __init__(self, rng=None):
+        self.rng = rng or random.Random()
+
+    def choose(self, session):
+        return self.rng.choice(session.legal_actions())
+
+
+class GreedyPolicy:
+    """Scores every legal action one step ahead and plays the best, breaking ties at random.
+
+    Reaching the goal wins outright; attacks are taken when the exact single
+    battle odds favour the attacker; otherwise pieces head for the goal and
+    the bench is sent out.
+
+    Parameters:
+        rng (random.Random): Breaks ties between equally scored actions.
+        matchups (MatchupMatrix): Prebuilt all-pairs odds to read instead of solving each pair.
+    """
+
+    WIN = 1000.0
+
+    def __init__(self, rng=None, matchups=None):
+        self.rng = rng or random.Random()
+        self.matchups = matchups
+
+    def battle_odds(self, first, second):
+        if self.matchups is not None and first in self.matchups and second in self.matchups:
+            odds = self.matchups.lookup(first, second)
+            if odds is not None:
+                return odds
+        return engine_odds(first, second)
+
+    def battle_edge(self, session, source, target):
+        """The attacker's chance to win minus its chance to lose, with both pieces in their real slots."""
+        attacker, defender = session.pieces.pieces[source], session.pieces.pieces[target]
+        if session.turn == 0:
+            odds = self.battle_odds(attacker, defender)
+            return odds['Player 1 Wins'] - odds['Player 2 Wins']
+        odds = self.battle_odds(defender, attacker)
+        return odds['Player 2 Wins'] - odds['Player 1 Wins']
+
+    def progress(self, session, source, target):
+        if target == GOALS[1 - session.turn]:
+            return self.WIN
+        return goal_distance(source, session.turn) - goal_distance(target, session.turn)
+
+    def score(self, session, action):
+        verb = action[0]
+        if verb == 'battle':
+            return 10 * self.battle_edge(session, action[1], action[2])
+        if verb == 'move':
+            return self.progress(session, session.selected, action[1])
+        if verb == 'select':
+            return max(self.progress(session, action[1], target) for target in session.destinations(action[1]))
+        if verb == 'enter':
+            return 0.5
+        if verb == 'cancel':
+            return -1.0
+        return 0.0
+
+    def choose(self, session):
+        best, choices = None, []
+        for action in session.legal_actions():
+            score = self.score(session, action)
+            if best is None or score > best:
+                best, choices = score, [action]
+            elif score == best:
+                choices.append(action)
+        return self.rng.choice(choices)
+
+
+class ScriptedPolicy:
+    """Plays a fixed list of actions in order, then hands over to ``fallback``.
+
+    Useful for reproducing a reported position or checking a rule step by step.
+    Raises ValueError once the script runs out with no fallback.
+    """
+
+    def __init__(self, actions, fallback=None):
+        self.actions = list(actions)
+        self.position = 0
+        self.fallback = fallback
+
+    def choose(self, session):
+        if self.position < len(self.actions):
+            self.position += 1
+            return tuple(self.actions[self.position - 1])
+        if self.fallback is None:
+            raise ValueError("The script has no more actions.")
+        return self.fallback.choose(session)
+
+
+POLICIES = {'random': RandomPolicy, 'greedy': GreedyPolicy}
+
+
+def open_matchups():
+    """Return the prebuilt matchup matrix, or None when it hasn't been built or NumPy is missing."""
+    try:
+        from pokeduel.data.matchups import MatchupMatrix
+    except ImportError:
+        return None
+    return MatchupMatrix.open()
+
+
+def play_duel(policies, parties, seed=None, game_id='headless', players=(1, 2)):
+    """Play one duel to the end between two policies and return the finished session."""
+    session = DuelSession(game_id, players, parties, seed=seed)
+    while not session.finished:
+        session.apply(policies[session.turn].choose(session))
+    return session
+
+
+def random_parties(rng, party_size=MAX_PARTY_SIZE):
+    names = get_registry().names
+    return [rng.sample(names, party_size) for _ in range(2)]
+
+
+def run_games(games, policies, seed=None, party_size=MAX_PARTY_SIZE):
+    """Play ``games`` duels with random parties and summarise the results.
+
+    Every duel's parties and seed come from one generator seeded with
+    ``seed``, so a run with the same seed and policies is reproducible.
+    """
+    rng = random.Random(seed)
+    summary = {'games': games, 'wins': [0, 0], 'draws': 0, 'inputs': 0, 'turns': 0, 'seconds': 0.0}
+    start = time.perf_counter()
+    for number in range(games):
+        session = play_duel(policies, random_parties(rng, party_size), rng.getrandbits(63), f"headless-{number}")
+        if session.winner is None:
+            summary['draws'] += 1
+        else:
+            summary['wins'][session.winner] += 1
+        summary['inputs'] += session.sequence
+        summary['turns'] += session.turn_counter
+    summary['seconds'] = time.perf_counter() - start
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play PokeDuel duels between computer policies, without Discord.")
+    parser.add_argument('--games', type=int, default=100, help="Number of duels to play")
+    parser.add_argument('--player1', choices=POLICIES, default='greedy', help="Policy for the first player slot")
+    parser.add_argument('--player2', choices=POLICIES, default='random', help="Policy for the second player slot")
+    parser.add_argument('--party-size', type=int, default=MAX_PARTY_SIZE, help="Pokémon per party")
+    parser.add_argument('--seed', type=int, help="Seed for a reproducible run")
+    args = parser.parse_args()
+
+    CombatManager.load_wheel_tables(get_registry().pokemon)
+    matchups = open_matchups() if 'greedy' in (args.player1, args.player2) else None
+    rng = random.Random(args.seed)
+    policies = []
+    for name in (args.player1, args.player2):
+        policy_rng = random.Random(rng.getrandbits(63))
+        policies.append(GreedyPolicy(policy_rng, matchups) if name == 'greedy' else POLICIES[name](policy_rng))
+    summary = run_games(args.games, policies, rng.getrandbits(63), args.party_size)
+
+    seconds = summary['seconds'] or float('inf')
+    print(f"Played {summary['games']} duels in {summary['seconds']:.2f}s "
+          f"({summary['games'] / seconds:.1f} games/s, {summary['inputs'] / seconds:.0f} inputs/s)")
+    print(f"{args.player1} (player 1) won {summary['wins'][0]}, {args.player2} (player 2) won {summary['wins'][1]}, "
+          f"{summary['draws']} drawn; {summary['turns'] / max(summary['games'], 1):.1f} turns per duel")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+from pokeduel.utils.bitboard import CELL_COUNT, COLUMNS, ROWS, cell_coords, cell_index
+from pokeduel.utils.cache import LRUCache
+
+# Extra diagonal edges on top of the orthogonal grid, as (x, y) cell pairs
+DIAGONAL_CONNECTIONS = (((2, 1), (3, 2)), ((3, 4), (4, 5)))
+
+
+def build_adjacency(diagonals=DIAGONAL_CONNECTIONS):
+    """Compile the node graph into a neighbour bitmask per cell index."""
+    adjacency = [0] * CELL_COUNT
+    edges = []
+    for x in range(ROWS):
+        for y in range(COLUMNS):
+            for nx, ny in ((x + 1, y), (x, y + 1)):
+                if nx < ROWS and ny < COLUMNS:
+                    edges.append((cell_index(x, y), cell_index(nx, ny)))
+    edges.extend((cell_index(*start), cell_index(*end)) for start, end in diagonals)
+    for a, b in edges:
+        adjacency[a] |= 1 << b
+        adjacency[b] |= 1 << a
+    return tuple(adjacency), tuple(edges)
+
+
+ADJACENCY, EDGES = build_adjacency()
+
+
+def mask_cells(mask):
+    """Return the ``(x, y)`` cells set in ``mask``, in index order."""
+    cells = []
+    while mask:
+        low = mask & -mask
+        cells.append(cell_coords(low.bit_length() - 1))
+        mask ^= low
+    return cells
+
+
+class ReachabilityEngine:
+    """Every legal destination for a piece with N movement points, memoised.
+
+    A breadth-first search over the node graph, one frontier bitmask per
+    step, that never enters or passes through a blocked cell. Results are
+    cached by ``(cell, movement, blockers)``, so repeated queries on an
+    unchanged board cost one lookup.
+    """
+
+    def __init__(self, adjacency=ADJACENCY, cache_size=4096):
+        self.adjacency = adjacency
+        self.cache = LRUCache(cache_size)
+
+    def reachable(self, cell, movement, blockers=0):
+        """Return a bitmask of cells reachable from ``cell`` within ``movement`` steps."""
+        blockers &= ~(1 << cell)
+        key = (cell, movement, blockers)
+        reached = self.cache.get(key)
+        if reached is None:
+            reached = self._search(cell, movement, blockers)
+            self.cache.put(key, reached)
+        return reached
+
+    def _search(self, cell, movement, blockers):
+        adjacency = self.adjacency
+        visited = frontier = 1 << cell
+        for _ in range(movement):
+            expanded = 0
+            while frontier:
+                low = frontier & -frontier
+                expanded |= adjacency[low.bit_length() - 1]
+                frontier ^= low
+            frontier = expanded & ~visited & ~blockers
+            if not frontier:
+                break
+            visited |= frontier
+        return visited & ~(1 << cell)
+
+    def destinations(self, coords, movement, blockers=0):
+        return mask_cells(self.reachable(cell_index(*coords), movement, blockers))
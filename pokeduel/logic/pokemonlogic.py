@@ -1,26 +1,29 @@
-from pokeduel.logic.combat import CombatManager
-import json
 import random
 
+from pokeduel.data.registry import get_registry
+from pokeduel.logic.combat import CombatManager
+from pokeduel.logic.wheel import WheelTable
+
 class CombatManagerPokemon(CombatManager):
     def __init__(self, name):
         super().__init__()
         self.name = name
-        self.pokemon_data = next((data for data in pokemons_data if data["Name"] == name), None)
+        self.pokemon_data = get_registry().get(name)
         if self.pokemon_data:
             self.base_wheel_size = self.pokemon_data["Base Wheel Size"]
             self.type_ = self.pokemon_data["Type"]
         else:
             self.base_wheel_size = []
             self.type_ = []
+        self.wheel = self.wheel_tables.get(name) or WheelTable(self.base_wheel_size)
 
     # Method to be implemented by subclasses for special move effects
     def apply_special_effects(self, move, opponent_move, outcome):
         raise NotImplementedError
 
     # Combat calculation considering special effects based on the Pokémon's move
-    def combat_calculation(self, pokemon1, pokemon2, plate1=None, plate2=None):
-        outcome, reason, additional_effects = super().combat_calculation(pokemon1, pokemon2, plate1, plate2)
+    def combat_calculation(self, state, pokemon1, pokemon2, plate1=None, plate2=None, rng=random):
+        outcome, reason, additional_effects = super().combat_calculation(state, pokemon1, pokemon2, plate1, plate2, rng)
         pokemon1_move = pokemon1.get('Move')
         pokemon2_move = pokemon2.get('Move')
 
@@ -37,24 +40,14 @@ class CombatManagerPokemon(CombatManager):
 class Pikachu(CombatManagerPokemon):
     def __init__(self):
         super().__init__("Pikachu")
-        with open('./pokemon.json') as file:
-            pokemons_data = json.load(file)
-        self.pikachu_data = next(p for p in pokemons_data if p['Name'] == 'Pikachu')
+        self.pikachu_data = self.pokemon_data
 
-    def spin_wheel(self):
+    def spin_wheel(self, rng=random):
         # If a Z-Move is available, it overrides the normal spin
-        z_move_available = any(move for move in self.base_wheel_size if move["Move Type"] == "White Z-Move")
-        if z_move_available:
-            return next(move for move in self.base_wheel_size if move["Move Type"] == "White Z-Move")
-        else:
-            # Normal spin_wheel logic using random
-            total_size = sum(move['Size'] for move in self.base_wheel_size)
-            spin = random.randint(1, total_size)
-            current_spin = 0
-            for move in self.base_wheel_size:
-                current_spin += move["Size"]
-                if spin <= current_spin:
-                    return move
+        z_move = next((move for move in self.wheel.moves if move["Move Type"] == "White Z-Move"), None)
+        if z_move:
+            return z_move
+        return self.wheel.spin(rng)
 
     def apply_special_effects(self, pikachu_move, opponent_move, outcome):
         move_details = next(
@@ -65,11 +58,11 @@ class Pikachu(CombatManagerPokemon):
             return "Gigavolt Havoc effect is applied to the opponent, causing paralysis."
         return ""
 
-    def combat_calculation(self, pokemon1, pokemon2, plate1=None, plate2=None):
+    def combat_calculation(self, state, pokemon1, pokemon2, plate1=None, plate2=None, rng=random):
         """Override combat calculation to include Pikachu's special rules.
         """
         # Call the parent class combat calculation
-        outcome, reason, additional_effects = super().combat_calculation(pokemon1, pokemon2, plate1, plate2)
+        outcome, reason, additional_effects = super().combat_calculation(state, pokemon1, pokemon2, plate1, plate2, rng)
 
         # Check if Pikachu is involved and apply special rules
         if pokemon1.get('Name') == 'Pikachu':
@@ -85,9 +78,7 @@ class Pikachu(CombatManagerPokemon):
 class Charmander(CombatManagerPokemon):
     def __init__(self):
         super().__init__("Charmander")
-        with open('./pokemon.json') as file:
-            pokemons_data = json.load(file)
-        self.charmander_data = next(p for p in pokemons_data if p['Name'] == 'Charmander')
+        self.charmander_data = self.pokemon_data
 
     def apply_special_effects(self, charmander_move, opponent_move, outcome):
         if charmander_move.get('Name') == 'Smokescreen' and outcome == 'Player 1 Wins':
@@ -95,11 +86,11 @@ class Charmander(CombatManagerPokemon):
         return ""
 
 
-    def combat_calculation(self, pokemon1, pokemon2, plate1=None, plate2=None):
+    def combat_calculation(self, state, pokemon1, pokemon2, plate1=None, plate2=None, rng=random):
         """Override combat calculation to include Charmander's special rules.
         """
         # Call the parent class combat calculation
-        outcome, reason, additional_effects = super().combat_calculation(pokemon1, pokemon2, plate1, plate2)
+        outcome, reason, additional_effects = super().combat_calculation(state, pokemon1, pokemon2, plate1, plate2, rng)
 
         # Check if Charmander is involved and apply special rules
         if pokemon1.get('Name') == 'Charmander':
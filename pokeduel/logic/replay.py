@@ -0,0 +1,99 @@
+import argparse
+import time
+
+from pokeduel.logic.duel import DuelSession
+
+
+def replay_duel(record, log=None):
+    """Re-run a recorded duel from its seed and inputs, with no Discord client, and return the session.
+
+    ``record`` is a duel record as returned by ``DatabaseManager.get_duel_record``.
+    If ``log`` is a list, ``(sequence, action, events)`` is appended to it for
+    every input. Raises ValueError if an input is not legal under the current rules.
+    """
+    session = DuelSession(record['game_id'], record['players'], record['parties'], seed=record['seed'])
+    for sequence, action in enumerate(record['actions'], 1):
+        try:
+            events = session.replay(action)
+        except ValueError as error:
+            raise ValueError(f"Input {sequence} of duel {record['game_id']} no longer replays: {error}") from None
+        if log is not None:
+            log.append((sequence, tuple(action), events))
+    return session
+
+
+def verify_duel(record):
+    """Return whether replaying ``record`` reaches the same result that was recorded."""
+    try:
+        session = replay_duel(record)
+    except ValueError:
+        return False
+    return session.finished == record['finished'] and session.winner == record['winner']
+
+
+def resimulate(records):
+    """Replay many recorded duels, e.g. after a rule change, and summarise how their results moved.
+
+    Returns a dict with the number of duels replayed, the ids whose result
+    changed or that no longer replay at all, and the elapsed seconds.
+    """
+    summary = {'duels': 0, 'changed': [], 'invalid': [], 'seconds': 0.0}
+    start = time.perf_counter()
+    for record in records:
+        summary['duels'] += 1
+        try:
+            session = replay_duel(record)
+        except ValueError:
+            summary['invalid'].append(record['game_id'])
+            continue
+        if session.finished != record['finished'] or session.winner != record['winner']:
+            summary['changed'].append(record['game_id'])
+    summary['seconds'] = time.perf_counter() - start
+    return summary
+
+
+def iter_duel_records(db, batch_size=500):
+    after = None
+    while True:
+        records = db.get_duel_records(after, batch_size)
+        yield from records
+        if len(records) < batch_size:
+            return
+        after = records[-1]['game_id']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded PokeDuel duels from their seeds and inputs.")
+    parser.add_argument('database', help="Path of the cog's SQLite database")
+    parser.add_argument('--game', help="Replay one duel and print its inputs and events instead of re-simulating all")
+    args = parser.parse_args()
+
+    from pokeduel.data.database import DatabaseManager
+
+    db = DatabaseManager(args.database, read_only=True)
+    try:
+        if args.game:
+            record = db.get_duel_record(args.game)
+            if record is None:
+                parser.error(f"No replayable duel with id {args.game}")
+            log = []
+            session = replay_duel(record, log)
+            for sequence, action, events in log:
+                print(f"{sequence:>4} {' '.join(map(str, action))}: {' '.join(events)}")
+            outcome = 'matches' if verify_duel(record) else 'DOES NOT match'
+            print(f"Replayed winner: {session.winner}, recorded winner: {record['winner']} ({outcome})")
+        else:
+            summary = resimulate(iter_duel_records(db))
+            rate = summary['duels'] / summary['seconds'] if summary['seconds'] else 0.0
+            print(f"Replayed {summary['duels']} duels in {summary['seconds']:.2f}s ({rate:.0f} duels/s): "
+                  f"{len(summary['changed'])} changed result, {len(summary['invalid'])} no longer replay")
+            for game_id in summary['changed']:
+                print(f"changed: {game_id}")
+            for game_id in summary['invalid']:
+                print(f"invalid: {game_id}")
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+import numpy as np
+
+from pokeduel.logic.wheel import MISS_SEGMENT, STATUS_DAMAGE_PENALTIES, battle_segment
+
+OUTCOMES = ('Draw', 'Player 1 Wins', 'Player 2 Wins')
+CHUNK_SIZE = 1 << 20
+
+
+def compile_side(table, status=None, damage_boost=0):
+    """Compile one side of a battle into arrays for vectorised spins.
+
+    Returns the cumulative wheel sizes, a map from the landed segment to the
+    segment that actually resolves, and the resolvable segments themselves.
+    The last resolvable segment is always a Miss so status effects can point
+    landed segments at it.
+    """
+    segments = [battle_segment(move) for move in table.moves] + [dict(MISS_SEGMENT)]
+    miss_index = len(segments) - 1
+    resolve = np.arange(len(table.moves), dtype=np.intp)
+
+    if status in ('Sleep', 'Frozen', 'Wait'):
+        resolve[:] = miss_index
+    elif status == 'Confusion':
+        resolve = np.roll(resolve, -1)
+    elif status in ('Paralysis', 'Burn'):
+        resolve[int(np.argmin([move['Size'] for move in table.moves]))] = miss_index
+
+    damage_delta = damage_boost - STATUS_DAMAGE_PENALTIES.get(status, 0)
+    if damage_delta:
+        for segment in segments[:-1]:
+            if segment['Move Type'] in ('White', 'Gold'):
+                segment['Damage'] += damage_delta
+
+    return np.asarray(table.cumulative, dtype=np.int64), resolve, segments
+
+
+def outcome_matrix(segments1, segments2, determine_outcome):
+    """Tabulate ``determine_outcome`` over every segment pair as indexes into ``OUTCOMES``."""
+    codes = {outcome: code for code, outcome in enumerate(OUTCOMES)}
+    matrix = np.zeros((len(segments1), len(segments2)), dtype=np.int8)
+    for i, move1 in enumerate(segments1):
+        for j, move2 in enumerate(segments2):
+            result = determine_outcome(move1, move2)
+            matrix[i, j] = codes.get(result[0], 0) if isinstance(result, tuple) else 0
+    return matrix
+
+
+def simulate_battles(table1, table2, battles, determine_outcome, status1=None, status2=None,
+                     damage_boost1=0, damage_boost2=0, rng=None):
+    """Simulate ``battles`` independent spins of two wheels and count the outcomes.
+
+    Spins are drawn as index arrays in chunks, mapped through each side's
+    status effects and resolved with a single lookup into a precomputed
+    landed-segment outcome table.
+    """
+    if not table1.total or not table2.total:
+        raise ValueError("Both Pokémon need a non-empty wheel to battle.")
+    rng = rng if rng is not None else np.random.default_rng()
+
+    cumulative1, resolve1, segments1 = compile_side(table1, status1, damage_boost1)
+    cumulative2, resolve2, segments2 = compile_side(table2, status2, damage_boost2)
+    landed = outcome_matrix(segments1, segments2, determine_outcome)[np.ix_(resolve1, resolve2)].ravel()
+    width = len(resolve2)
+
+    counts = np.zeros(len(OUTCOMES), dtype=np.int64)
+    remaining = battles
+    while remaining > 0:
+        size = min(remaining, CHUNK_SIZE)
+        spins1 = np.searchsorted(cumulative1, rng.integers(table1.total, size=size), side='right')
+        spins2 = np.searchsorted(cumulative2, rng.integers(table2.total, size=size), side='right')
+        counts += np.bincount(landed[spins1 * width + spins2], minlength=len(OUTCOMES))
+        remaining -= size
+
+    return {outcome: int(count) for outcome, count in zip(OUTCOMES, counts)}
@@ -0,0 +1,158 @@
+import random
+from bisect import bisect_right
+from collections import ChainMap
+from itertools import accumulate
+
+MISS_SEGMENT = {'Name': 'Miss', 'Move Type': 'Red', 'Damage': 0, 'Stars': 0}
+STATUS_DAMAGE_PENALTIES = {'Poison': 20, 'Noxious': 40, 'Burn': 10}
+
+
+def move_colour(move):
+    """Return the battle colour of a move, folding Z-Moves into their base colour."""
+    return move['Move Type'].split(' ')[0].capitalize()
+
+
+def move_damage(move):
+    """Return a move's damage as an int, accepting raw catalog strings such as ``"20x"``."""
+    damage = move.get('Damage', 0)
+    if isinstance(damage, int):
+        return damage
+    digits = ''
+    for char in damage:
+        if not char.isdigit():
+            break
+        digits += char
+    return int(digits) if digits else 0
+
+
+def move_stars(move):
+    """Return a move's star count, reading the ``☆`` notation used in raw catalog data."""
+    if 'Stars' in move:
+        return move['Stars']
+    damage = move.get('Damage', '')
+    return damage.count('☆') if isinstance(damage, str) else 0
+
+
+def overlay_move(move, changes):
+    """Return a copy-on-write view of ``move`` with ``changes`` layered on top.
+
+    Reads fall through to the shared catalog record and writes land on the
+    overlay, so per-duel effects never touch the base wheel.
+    """
+    return ChainMap(changes, move)
+
+
+def split_overlays(move):
+    """Return the overlays stacked on ``move``, innermost first, and the base record beneath them."""
+    layers = []
+    while isinstance(move, ChainMap):
+        layers.extend(move.maps[:-1])
+        move = move.maps[-1]
+    layers.reverse()
+    return layers, move
+
+
+def reapply_overlays(move, segment):
+    """Stack the overlays on ``move`` onto another wheel ``segment``.
+
+    Overlays store resulting values, so numeric fields carry over as the
+    change they made (a +10 damage bonus stays +10) and the rest as set.
+    """
+    layers, below = split_overlays(move)
+    for changes in layers:
+        rebased = {}
+        for key, value in changes.items():
+            previous = below.get(key)
+            if type(value) is int and type(previous) is int:
+                rebased[key] = segment.get(key, 0) + value - previous
+            else:
+                rebased[key] = value
+        below, segment = overlay_move(below, changes), overlay_move(segment, rebased)
+    return segment
+
+
+def battle_segment(move):
+    """Return the fields of a move that decide a battle, with numeric damage and stars."""
+    return {'Name': move['Name'], 'Move Type': move_colour(move),
+            'Damage': move_damage(move), 'Stars': move_stars(move)}
+
+
+class WheelTable:
+    """Precompiled spin wheel for a single species.
+
+    The table keeps the species' move records in wheel order alongside a
+    cumulative size array, so a spin is one random draw plus a bisect instead
+    of rebuilding a list with one entry per wheel unit.
+    """
+
+    __slots__ = ('moves', 'cumulative', 'total')
+
+    def __init__(self, moves):
+        self.moves = tuple(moves)
+        self.cumulative = tuple(accumulate(move['Size'] for move in self.moves))
+        self.total = self.cumulative[-1] if self.cumulative else 0
+
+    @classmethod
+    def from_pokemon(cls, pokemon):
+        return cls(pokemon.get('Base Wheel Size', []))
+
+    def index_at(self, position):
+        """Return the index of the segment covering ``position`` (0 <= position < total)."""
+        return bisect_right(self.cumulative, position)
+
+    def spin_index(self, rng=random):
+        if not self.total:
+            raise IndexError("Cannot spin an empty wheel")
+        return bisect_right(self.cumulative, rng.randrange(self.total))
+
+    def spin(self, rng=random):
+        return self.moves[self.spin_index(rng)]
+
+    def probabilities(self):
+        """Return the probability of landing on each segment, in wheel order."""
+        if not self.total:
+            return []
+        return [move['Size'] / self.total for move in self.moves]
+
+    def effective_segments(self, status=None, damage_boost=0):
+        """Return ``(weight, segment)`` pairs for what this wheel resolves to in battle.
+
+        Parameters:
+            status (str): Status condition of the spinning Pokémon, if any.
+            damage_boost (int): Flat damage bonus from plates for White and Gold moves.
+
+        Segments that resolve identically are merged, and weights are the raw
+        wheel sizes so callers can keep exact integer counts.
+        """
+        if not self.total:
+            return []
+        if status in ('Sleep', 'Frozen', 'Wait'):
+            return [(self.total, dict(MISS_SEGMENT))]
+
+        segments = [battle_segment(move) for move in self.moves]
+        weights = [move['Size'] for move in self.moves]
+        if status == 'Confusion':
+            # Every spin resolves as the segment after the one it landed on
+            weights = weights[-1:] + weights[:-1]
+        elif status in ('Paralysis', 'Burn'):
+            smallest = min(range(len(self.moves)), key=lambda index: self.moves[index]['Size'])
+            segments[smallest] = dict(MISS_SEGMENT)
+
+        damage_delta = damage_boost - STATUS_DAMAGE_PENALTIES.get(status, 0)
+        merged = {}
+        for weight, segment in zip(weights, segments):
+            if not weight:
+                continue
+            if damage_delta and segment['Move Type'] in ('White', 'Gold'):
+                segment['Damage'] += damage_delta
+            key = (segment['Move Type'], segment['Damage'], segment['Stars'])
+            if key in merged:
+                merged[key][0] += weight
+            else:
+                merged[key] = [weight, segment]
+        return [(weight, segment) for weight, segment in merged.values()]
+
+
+def build_wheel_tables(pokemon_data):
+    """Compile a wheel table for every species in a name -> record mapping."""
+    return {name: WheelTable.from_pokemon(pokemon) for name, pokemon in pokemon_data.items()}
@@ -1,43 +1,49 @@
+from discord import ButtonStyle, SelectOption
 from discord.ext import commands
-from discord.ui import Button, View, ButtonStyle, Select, SelectOption
+from discord.ui import Button, View, Select
+from pokeduel.data.registry import get_registry
+from pokeduel.utils.constants import MAX_PARTY_SIZE
 
 class PartyManager(commands.Cog):
-    def __init__(self, bot, db_path):
+    def __init__(self, bot, db):
         self.bot = bot
-        self.db_manager = PartyDatabaseManager(db_path)
+        self.db_manager = db
 
     @commands.command()
     async def party(self, ctx):
         view = PartyButtonView(self.db_manager, ctx.author.id)
+        await view.refresh_view()
         await ctx.send("Your party:", view=view)
 
 class PokemonSelect(Select):
-    def __init__(self, db, user_id, placeholder, callback_method, is_z_move_select=False):
+    def __init__(self, db, user_id, placeholder, callback_method, available_items, is_z_move_select=False):
         super().__init__(placeholder=placeholder, min_values=1, max_values=1)
         self.db = db
         self.user_id = user_id
         self.callback_method = callback_method
         self.is_z_move_select = is_z_move_select
-        self.populate_options()
+        self.populate_options(available_items)
 
-    def populate_options(self):
+    def populate_options(self, available_items):
         if self.is_z_move_select:
-            party = self.db.get_user_party(self.user_id)
-            for pokemon_name in party:
-                pokemon_data = self.db.get_pokemon_data(pokemon_name)
+            registry = get_registry()
+            for pokemon_name in available_items:
+                # Parties also hold plates, which have no wheel
+                pokemon_data = registry.get(pokemon_name)
+                if pokemon_data is None:
+                    continue
                 z_moves = [move['Name'] for move in pokemon_data['Base Wheel Size'] if 'Z-Move' in move['Move Type']]
                 for z_move in z_moves:
                     self.options.append(SelectOption(label=f"{pokemon_name}: {z_move}", value=f"{pokemon_name}:{z_move}"))
         else:
             # Standard implementation for adding Pokémon to party
-            available_pokemon = self.db.get_inventory(self.user_id)
-            self.options = [SelectOption(label=pokemon, value=pokemon) for pokemon in available_pokemon]
+            self.options = [SelectOption(label=pokemon, value=pokemon) for pokemon in available_items]
 
     async def callback(self, interaction):
         selected_item = self.values[0]
         if self.is_z_move_select:
             pokemon, z_move = selected_item.split(":")
-            self.db.set_pokemon_z_move(self.user_id, pokemon, z_move)
+            await self.db.set_pokemon_z_move(self.user_id, pokemon, z_move)
             await interaction.response.send_message(f"Selected Z-Move {z_move} for {pokemon}.", ephemeral=True)
         else:
             await self.callback_method(self, selected_item, interaction)
@@ -47,23 +53,22 @@ class PartyButtonView(View):
         super().__init__()
         self.db = db
         self.user_id = user_id
-        self.refresh_view()
 
-    def refresh_view(self):
+    async def refresh_view(self):
         self.clear_items()
-        party = self.db.get_user_party(self.user_id)
+        party = await self.db.get_user_party(self.user_id)
         for i, pokemon in enumerate(party):
             self.add_item(Button(style=ButtonStyle.primary, label=pokemon, custom_id=f"remove_{i}"))
 
-        self.add_item(PokemonSelect(self.db, self.user_id, 'Add to Party', self.add_to_party))
-        self.add_item(PokemonSelect(self.db, self.user_id, 'Select Z-Move', self.select_z_move, is_z_move_select=True))
+        inventory = await self.db.get_inventory(self.user_id)
+        self.add_item(PokemonSelect(self.db, self.user_id, 'Add to Party', self.add_pokemon_to_party, inventory))
+        self.add_item(PokemonSelect(self.db, self.user_id, 'Select Z-Move', None, party, is_z_move_select=True))
 
     async def add_pokemon_to_party(self, select, pokemon, interaction):
         try:
-            party = self.db.get_user_party(self.user_id)
+            party = await self.db.get_user_party(self.user_id)
             if len(party) < MAX_PARTY_SIZE:
-                party.append(pokemon)
-                self.db.update_user_party(self.user_id, party)
+                await self.db.add_to_party(self.user_id, pokemon)
                 await interaction.response.send_message(f"{pokemon} added to your party!", ephemeral=True)
             else:
                 await interaction.response.send_message("Your party is full.", ephemeral=True)
@@ -72,10 +77,9 @@ class PartyButtonView(View):
 
     async def add_plate_to_party(self, select, plate, interaction):
         try:
-            party = self.db.get_user_party(self.user_id)
+            party = await self.db.get_user_party(self.user_id)
             if len(party) < MAX_PARTY_SIZE:  # Assuming a limit to the party size
-                party.append(plate)
-                self.db.update_user_party(self.user_id, party)
+                await self.db.add_to_party(self.user_id, plate)
                 await interaction.response.send_message(f"{plate} added to your party!", ephemeral=True)
             else:
                 await interaction.response.send_message("Your party is full.", ephemeral=True)
@@ -92,7 +96,7 @@ class PartyButtonView(View):
         custom_id = interaction.data['custom_id']
         action, index = custom_id.split("_")
         if action == "remove":
-            self.db.remove_item_from_party(self.user_id, int(index))
-            self.refresh_view()
+            await self.db.remove_item_from_party(self.user_id, int(index))
+            await self.refresh_view()
             await interaction.response.send_message("Item removed from your party.", ephemeral=True)
 
@@ -1,41 +1,155 @@
-import json
+import asyncio
+import logging
 import random
-from datetime import datetime, timedelta
+from functools import cached_property
 from redbot.core import commands, Config
-from discord import Member, ButtonStyle
-from discord.ext import commands
-from discord.ui import Button, View
+from discord import Member, ButtonStyle, Interaction
+from discord.ui import Button, View, button
 
-from pokeduel.gatcha import ShopView
-from pokeduel.party import PartyManager
+from pokeduel.gatcha import ShopView, summarise_pulls
+from pokeduel.party import PartyManager, PartyButtonView
 from pokeduel.ingame import GameManager
-from pokeduel.utils.board import BoardManager
-from pokeduel.data.database import DatabaseManager
+from pokeduel.utils.board import BoardManager, BoardVisualizer
+from pokeduel.data.database import AsyncDatabaseManager
+from pokeduel.data.registry import get_registry
+from pokeduel.logic.combat import CombatManager
+from pokeduel.logic.gacha import GachaEngine
+from pokeduel.utils.constants import MAX_ADMIN_PULLS, MATCHMAKING_TIMEOUT, FLASH_SALE_DURATION
+from pokeduel.utils.scheduler import TimerWheel
+from pokeduel.utils.timing import StartupTimer
+
+log = logging.getLogger("red.pokeduel")
 
 # predicate saves
 def has_started_save():
     async def predicate(ctx):
-        return ctx.cog.db.has_started_save(ctx.author.id)
+        return await ctx.cog.db.has_started_save(ctx.author.id)
     return commands.check(predicate)
 
 class PokeDuel(commands.Cog):
     def __init__(self, bot):
-        self.bot = bot
-        self.db = DatabaseManager('./pokeduel_db.sqlite')
-        self.party_manager = PartyManager()
-        self.board_manager = BoardManager(self.party_manager)
-        self.game_manager = GameManager(self.bot, self.db, self.board_manager)
-        self.config = Config.get_conf(self, identifier=10112123, force_registration=True)
-        self.config.register_user(**default_user)
-        self.gacha = PokeGacha()
-        self.plates_data = self.load_json('./plates.json')
-        self.pokemon_data = self.load_json('./pokemon.json')
+        self.startup_timer = StartupTimer()
+        with self.startup_timer.phase('cog init'):
+            self.bot = bot
+            # Every timeout in the cog (turns, matchmaking, flash sales) runs off this one wheel
+            self.scheduler = TimerWheel()
+            self.matchmaking_queue = {}
+            # Player data lives in the SQLite database, so nothing is registered here
+            self.config = Config.get_conf(self, identifier=10112123, force_registration=True)
+        self._warmup_task = None
+
+    # Heavy resources are created on first use, or earlier by warm_up()
+    @cached_property
+    def db(self):
+        # The one storage service every manager and view shares; closed in cog_unload
+        with self.startup_timer.phase('database'):
+            return AsyncDatabaseManager('./pokeduel_db.sqlite')
+
+    @cached_property
+    def party_manager(self):
+        return PartyManager(self.bot, self.db)
+
+    @cached_property
+    def board_manager(self):
+        return BoardManager(self.party_manager)
+
+    @cached_property
+    def game_manager(self):
+        return GameManager(self.bot, self.db, self.board_manager, self.scheduler)
+
+    @cached_property
+    def registry(self):
+        with self.startup_timer.phase('catalog'):
+            registry = get_registry()
+        with self.startup_timer.phase('wheel tables'):
+            CombatManager.load_wheel_tables(registry.pokemon)
+        return registry
+
+    @cached_property
+    def gacha(self):
+        return GachaEngine(self.registry)
+
+    @cached_property
+    def matchups(self):
+        with self.startup_timer.phase('matchup matrix'):
+            # Deferred so NumPy is only imported off the load path
+            from pokeduel.data.matchups import MatchupMatrix
+
+            return MatchupMatrix.open()
+
+    @property
+    def pokemon_data(self):
+        return self.registry.pokemon
+
+    @property
+    def plates_data(self):
+        return self.registry.plates
+
+    async def cog_load(self):
+        self.scheduler.start()
+        self._warmup_task = asyncio.create_task(self.warm_up())
+
+    async def cog_unload(self):
+        self.scheduler.stop()
+        if self._warmup_task is not None:
+            self._warmup_task.cancel()
+        if 'db' in self.__dict__:
+            await self.db.close()
+
+    async def warm_up(self):
+        """Load the catalog, combat tables and matchup matrix off the event loop, then restore open duels.
+
+        Each step fails on its own: a missing or stale matrix, or no NumPy, is
+        logged and never keeps unfinished duels from being restored.
+        """
+        loop = asyncio.get_running_loop()
+        for resource in ('registry', 'matchups'):
+            try:
+                await loop.run_in_executor(None, getattr, self, resource)
+            except Exception:
+                log.exception("Could not load the PokeDuel %s", resource)
+        log.info("PokeDuel startup phases:\n%s", self.startup_timer.report())
+        try:
+            self.rotate_flash_sale()
+        except Exception:
+            log.exception("Could not start the flash sale rotation")
+        # Channels are only resolvable once the bot's cache is populated
+        await self.bot.wait_until_red_ready()
+        try:
+            restored = await self.game_manager.restore_duels()
+        except Exception:
+            log.exception("Could not restore unfinished duels")
+            return
+        if restored:
+            log.info("Restored %d unfinished duel(s)", len(restored))
+
+    def rotate_flash_sale(self):
+        self.gacha.rotate_flash_sale()
+        self.scheduler.schedule(FLASH_SALE_DURATION, self.rotate_flash_sale)
+
+    @commands.command()
+    @commands.is_owner()
+    async def startupreport(self, ctx):
+        """Show how long each PokeDuel startup phase took."""
+        await ctx.send(f"```\n{self.startup_timer.report()}\n```")
+
+    @commands.command()
+    @commands.is_owner()
+    async def dbcache(self, ctx):
+        """Show the party/inventory cache's size and hit rate."""
+        await ctx.send(f"Party/inventory cache: {self.db.cache.stats()}")
+
+    @commands.command()
+    @commands.is_owner()
+    async def rendercache(self, ctx):
+        """Show the rendered-board cache's size, byte footprint and hit rate."""
+        await ctx.send(f"Board image cache: {BoardVisualizer.png_cache.stats()}")
 
     @commands.command()
     async def start(self, ctx):
         await ctx.send("Welcome to PokeDuel! Type `!newgame` to begin your journey!")
 
-    @commands.command(aliases=['begin', 'start'])
+    @commands.command(aliases=['begin'])
     async def newgame(self, ctx):
         await self.handle_new_game(ctx)
 
@@ -43,15 +157,46 @@ class PokeDuel(commands.Cog):
     @has_started_save()
     async def shop(self, ctx):
         user_id = ctx.author.id
-        shop_view = ShopView(user_id, self.db, self.pokemon_data, self.plates_data)
+        shop_view = ShopView(user_id, self.db, self.gacha)
         await ctx.send("Welcome to the Shop!", view=shop_view)
 
+    @commands.command()
+    @commands.is_owner()
+    async def bulkpull(self, ctx, member: Member, count: int):
+        """Grant a player free gacha pulls, written in a single transaction."""
+        if not 0 < count <= MAX_ADMIN_PULLS:
+            await ctx.send(f"Pull count must be between 1 and {MAX_ADMIN_PULLS}.")
+            return
+        if not await self.db.has_started_save(member.id):
+            await ctx.send(f"{member.display_name} hasn't started a game yet.")
+            return
+
+        pulls, _ = self.gacha.active_banner.pull(count, rng=self.gacha.rng)
+        await self.db.grant_items(member.id, [pokemon for pokemon, _ in pulls])
+        await ctx.send(f"Granted {count} pulls to {member.mention}: {summarise_pulls(pulls)}")
+
+    @commands.command()
+    @commands.is_owner()
+    async def rateup(self, ctx, *species: str):
+        """Start a rate-up banner for the given Pokémon, or end it when none are given."""
+        if not species:
+            self.gacha.end_rate_up()
+            await ctx.send("Rate-up ended, the standard banner is active again.")
+            return
+        try:
+            self.gacha.start_rate_up('rate-up', species)
+        except ValueError as e:
+            await ctx.send(str(e))
+            return
+        await ctx.send(f"Rate-up banner is live for: {', '.join(species)}")
+
     @commands.command()
     @has_started_save()
     async def customize_party(self, ctx):
         user_id = ctx.author.id
         party_button_view = PartyButtonView(self.db, user_id)
-        await party_button_view.refresh(ctx)
+        await party_button_view.refresh_view()
+        await ctx.send("Your party:", view=party_button_view)
 
     @commands.command()
     @has_started_save()
@@ -60,60 +205,62 @@ class PokeDuel(commands.Cog):
             await ctx.send("One of the players is currently in matchmaking.")
             return
 
-        if ctx.author.id in self.ongoing_duels or opponent.id in self.ongoing_duels:
+        if self.game_manager.is_in_duel(ctx.author.id) or self.game_manager.is_in_duel(opponent.id):
             await ctx.send("One of the players is currently in a duel.")
             return
 
-        self.prepare_for_duel(ctx.author, opponent)
-        await ctx.send(f"Duel between {ctx.author.mention} and {opponent.mention} has started!")
+        await self.game_manager.start_duel(ctx, ctx.author, opponent)
 
-    # Helper methods
-    def load_json(self, file_path):
-        with open(file_path, 'r') as file:
-            return json.load(file)
+    @commands.Cog.listener()
+    async def on_interaction(self, interaction):
+        # Duel buttons carry their game id, so one listener serves every open duel
+        await self.game_manager.handle_interaction(interaction)
 
+    # Helper methods
     async def handle_new_game(self, ctx):
         user_id = ctx.author.id
-        if self.is_new_player(user_id):
-            self.initialize_new_player(user_id)
+        if await self.is_new_player(user_id):
+            await self.initialize_new_player(user_id)
             await ctx.send(f"New game started with 5000 crystals!")
         else:
             await ctx.send("Resuming your existing game.")
 
-    def is_new_player(self, user_id):
-        return not self.db.has_started_save(user_id)
+    async def is_new_player(self, user_id):
+        return not await self.db.has_started_save(user_id)
 
-    def initialize_new_player(self, user_id):
-        self.db.initialize_new_user(user_id, 5000)
-
-    def prepare_for_duel(self, player1, player2):
-        self.setup_game(player1)
-        self.setup_game(player2)
-        self.game_manager.start_game(player1, player2)
-
-    def setup_game(self, player):
-        self.board_manager.setup_board()
-        self.party_manager.select_party(player)
+    async def initialize_new_player(self, user_id):
+        await self.db.initialize_new_user(user_id, 5000)
 
     def is_player_available_for_duel(self, player):
         return self.db.is_player_available(player.id)
 
-    async def enter_matchmaking(self, player):
-        self.matchmaking_queue[player.id] = datetime.now()
-        await asyncio.sleep(30)  # Wait for 30 seconds
-        if player.id in self.matchmaking_queue:
-            await self.find_match(player)
+    async def enter_matchmaking(self, player, channel):
+        """Pair ``player`` with the longest-waiting player, or queue them until the matchmaking timeout.
 
-    async def find_match(self, player):
-        for opponent_id, time_joined in self.matchmaking_queue.items():
-            if opponent_id != player.id and datetime.now() - time_joined < timedelta(seconds=30):
-                self.prepare_for_duel(player, self.bot.get_user(opponent_id))
-                self.leave_matchmaking(player)
-                self.leave_matchmaking(self.bot.get_user(opponent_id))
-                break
+        Returns True when a duel was started.
+        """
+        if player.id in self.matchmaking_queue or self.game_manager.is_in_duel(player.id):
+            return False
+        if self.matchmaking_queue:
+            opponent_id = next(iter(self.matchmaking_queue))
+            opponent, _, timer = self.matchmaking_queue.pop(opponent_id)
+            self.scheduler.cancel(timer)
+            await self.game_manager.start_duel(channel, opponent, player)
+            return True
+        timer = self.scheduler.schedule(MATCHMAKING_TIMEOUT, self.expire_matchmaking, player.id)
+        self.matchmaking_queue[player.id] = (player, channel, timer)
+        return False
+
+    async def expire_matchmaking(self, player_id):
+        entry = self.matchmaking_queue.pop(player_id, None)
+        if entry is not None:
+            player, channel, _ = entry
+            await channel.send(f"{player.mention}, no opponent was found. Try again later.")
 
     def leave_matchmaking(self, player):
-        self.matchmaking_queue.pop(player.id, None)
+        entry = self.matchmaking_queue.pop(player.id, None)
+        if entry is not None:
+            self.scheduler.cancel(entry[2])
 
 class StartGameView(View):
     def __init__(self, ctx, cog):
@@ -138,20 +285,17 @@ class GameStatusView(View):
         super().__init__()
         self.cog = cog
 
-        self.add_item(Button(label='Game Status', style=ButtonStyle.grey, custom_id='game_status'))
-        self.add_item(Button(label='Help', style=ButtonStyle.grey, custom_id='help'))
-        self.add_item(Button(label='Enter Matchmaking', style=ButtonStyle.blue, custom_id='matchmaking'))
-
-    @discord.ui.button(label='Game Status', style=ButtonStyle.grey)
-    async def game_status(self, interaction: discord.Interaction, button: discord.ui.Button):
+    @button(label='Game Status', style=ButtonStyle.grey)
+    async def game_status(self, interaction: Interaction, button: Button):
         game_status = self.cog.get_game_status(interaction.user)
         await interaction.response.send_message(f"Game Status: {game_status}" if game_status else "No active game found.")
 
-    @discord.ui.button(label='Help', style=ButtonStyle.grey)
-    async def help(self, interaction: discord.Interaction, button: discord.ui.Button):
+    @button(label='Help', style=ButtonStyle.grey)
+    async def help(self, interaction: Interaction, button: Button):
         help_message = self.cog.get_help_message()
         await interaction.response.send_message(help_message)
 
-    async def matchmaking(self, button, interaction):
-        await self.cog.enter_matchmaking(interaction.user)
-        await interaction.response.send_message("Searching for an opponent...")
\ No newline at end of file
+    @button(label='Enter Matchmaking', style=ButtonStyle.primary)
+    async def matchmaking(self, interaction: Interaction, button: Button):
+        matched = await self.cog.enter_matchmaking(interaction.user, interaction.channel)
+        await interaction.response.send_message("Opponent found!" if matched else "Searching for an opponent...")
\ No newline at end of file
@@ -0,0 +1,125 @@
+from functools import lru_cache
+from hashlib import blake2b
+
+ROWS = 8
+COLUMNS = 7
+CELL_COUNT = ROWS * COLUMNS
+PLAYER_SLOTS = 2
+
+
+def cell_index(x, y):
+    """Return the bit index of board cell ``(x, y)``, matching ``BoardManager.board[x][y]``."""
+    return x * COLUMNS + y
+
+
+def cell_coords(index):
+    return divmod(index, COLUMNS)
+
+
+def _ray_masks():
+    # between[a][b] holds the cells strictly between a and b when they share a row, column or
+    # diagonal, and 0 otherwise (unaligned moves have no straight path to block)
+    between = [[0] * CELL_COUNT for _ in range(CELL_COUNT)]
+    for source in range(CELL_COUNT):
+        x, y = cell_coords(source)
+        for step_x, step_y in ((0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (1, -1), (-1, 1), (-1, -1)):
+            mask = 0
+            cx, cy = x + step_x, y + step_y
+            while 0 <= cx < ROWS and 0 <= cy < COLUMNS:
+                target = cell_index(cx, cy)
+                between[source][target] = mask
+                mask |= 1 << target
+                cx, cy = cx + step_x, cy + step_y
+    return tuple(tuple(row) for row in between)
+
+
+def _neighbour_masks():
+    neighbours = []
+    for index in range(CELL_COUNT):
+        x, y = cell_coords(index)
+        mask = 0
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                if (dx or dy) and 0 <= x + dx < ROWS and 0 <= y + dy < COLUMNS:
+                    mask |= 1 << cell_index(x + dx, y + dy)
+        neighbours.append(mask)
+    return tuple(neighbours)
+
+
+BETWEEN = _ray_masks()
+NEIGHBOURS = _neighbour_masks()
+
+
+@lru_cache(maxsize=65536)
+def zobrist_key(slot, index, piece):
+    """Return the 64-bit Zobrist key for ``piece`` owned by player ``slot`` on cell ``index``.
+
+    Keys are derived from a hash of their inputs rather than a random table, so
+    position hashes are stable across processes and piece ids need no registry.
+    """
+    digest = blake2b(f"{slot}:{index}:{piece}".encode(), digest_size=8, person=b'pokeduel').digest()
+    return int.from_bytes(digest, 'little')
+
+
+class Bitboard:
+    """Piece placement as one occupancy bitmask per player plus a piece id per cell.
+
+    Path, emptiness and adjacency checks are single mask operations against
+    the precomputed ``BETWEEN`` and ``NEIGHBOURS`` tables, and ``copy`` is two
+    small list copies, so search code can clone positions freely. ``hash`` is
+    the position's Zobrist hash, updated incrementally on every change.
+    """
+
+    __slots__ = ('owners', 'pieces', 'hash')
+
+    def __init__(self, owners=None, pieces=None, position_hash=0):
+        self.owners = list(owners) if owners is not None else [0] * PLAYER_SLOTS
+        self.pieces = list(pieces) if pieces is not None else [None] * CELL_COUNT
+        self.hash = position_hash
+
+    def copy(self):
+        return Bitboard(self.owners, self.pieces, self.hash)
+
+    @property
+    def occupied(self):
+        return self.owners[0] | self.owners[1]
+
+    def is_empty(self, index):
+        return not self.occupied >> index & 1
+
+    def owner_of(self, index):
+        """Return the player slot holding ``index``, or None when the cell is empty."""
+        for slot, mask in enumerate(self.owners):
+            if mask >> index & 1:
+                return slot
+        return None
+
+    def is_path_blocked(self, source, target):
+        return bool(self.occupied & BETWEEN[source][target])
+
+    def is_adjacent(self, source, target):
+        return bool(NEIGHBOURS[source] >> target & 1)
+
+    def place(self, slot, piece, index):
+        if not self.is_empty(index):
+            raise ValueError("Target cell is not empty.")
+        self.owners[slot] |= 1 << index
+        self.pieces[index] = piece
+        self.hash ^= zobrist_key(slot, index, piece)
+
+    def remove(self, index):
+        slot = self.owner_of(index)
+        if slot is None:
+            return None
+        self.owners[slot] &= ~(1 << index)
+        piece, self.pieces[index] = self.pieces[index], None
+        self.hash ^= zobrist_key(slot, index, piece)
+        return piece
+
+    def move(self, source, target):
+        slot = self.owner_of(source)
+        if slot is None:
+            raise ValueError("There is no piece to move.")
+        if not self.is_empty(target):
+            raise ValueError("Target cell is not empty.")
+        self.place(slot, self.remove(source), target)
@@ -1,11 +1,22 @@
 from collections import deque
-from discord import ButtonStyle, Button
+from io import BytesIO
+from discord import ButtonStyle, Button, File
 from discord.ui import View
-from PIL import Image, ImageDraw
+from pokeduel.utils.bitboard import CELL_COUNT, COLUMNS, PLAYER_SLOTS, ROWS, Bitboard, cell_coords, cell_index
+from pokeduel.logic.duel import GOALS, SPAWNS
+from pokeduel.logic.movement import ADJACENCY, EDGES, ReachabilityEngine
+from pokeduel.utils.cache import LRUCache
 
 class BoardManager:
-    def __init__(self):
+    # The node graph is fixed, so every board shares one memoised reachability engine
+    reachability = ReachabilityEngine()
+
+    def __init__(self, party_manager=None):
+        self.party_manager = party_manager
+        # Terrain (spawn/goal/empty) never moves; pieces live on the bitboard
         self.board = self.initialize_board()
+        self.pieces = Bitboard()
+        self.player_slots = {}
         self.action_history = deque([], maxlen=5)
 
     @staticmethod
@@ -18,8 +29,8 @@ class BoardManager:
         return board
 
     def create_button_for_cell(self, x, y):
-        cell_value = self.board[x][y]
-        label = self.get_label_for_cell(cell_value)
+        piece = self.pieces.pieces[cell_index(x, y)]
+        label = str(piece) if piece is not None else self.get_label_for_cell(self.board[x][y])
         return Button(style=ButtonStyle.secondary, label=label, custom_id=f"{x},{y}")
 
     def get_label_for_cell(self, cell_value):
@@ -36,111 +47,43 @@ class BoardManager:
                 button = self.create_button_for_cell(x, y)
                 view.add_item(button)
 
+    def slot_for(self, player_id):
+        slot = self.player_slots.get(player_id)
+        if slot is None:
+            if len(self.player_slots) == PLAYER_SLOTS:
+                raise ValueError("This board already has two players.")
+            slot = self.player_slots[player_id] = len(self.player_slots)
+        return slot
 
+    def place_piece(self, player_id, piece, coords):
+        self.pieces.place(self.slot_for(player_id), piece, cell_index(*coords))
 
-class BoardVisualizer:
-    def __init__(self, board_manager):
-        self.board_manager = board_manager
-        self.cell_size = 100
-        self.colors = {
-            'G': 'purple',
-            'S': 'blue',
-            'E': 'green',
-            'P': 'black',
-            'B': 'grey',
-            'PC': 'pink',
-            'Y': 'yellow'
-        }
-        self.board_width = 8
-        self.board_height = 7
-        self.image_width = self.cell_size * self.board_width
-        self.image_height = self.cell_size * self.board_height
-        self.img = Image.new('RGB', (self.image_width, self.image_height), 'white')
-        self.draw = ImageDraw.Draw(self.img)
+    def piece_at(self, coords):
+        return self.pieces.pieces[cell_index(*coords)]
 
-    def draw_cell(self, x, y, cell_type):
-        top_left_corner = (x * self.cell_size, y * self.cell_size)
-        bottom_right_corner = ((x + 1) * self.cell_size, (y + 1) * self.cell_size)
-        self.draw.rectangle([top_left_corner, bottom_right_corner], fill=self.colors[cell_type], outline="black")
-
-    def draw_nodes_and_lines(self):
-        # Nodes are only on SEG tiles
-        nodes = [(x, y) for y in range(self.board_height) for x in range(self.board_width)
-                 if self.board_manager.board[y][x] in ['E', 'S', 'G']]
-        for x, y in nodes:
-            center = (x * self.cell_size + self.cell_size // 2, y * self.cell_size + self.cell_size // 2)
-            self.draw.ellipse((center[0] - 5, center[1] - 5, center[0] + 5, center[1] + 5), fill='black')
-
-        for x, y in nodes:
-            if (x + 1, y) in nodes:
-                self.draw.line([(x * self.cell_size + self.cell_size // 2, y * self.cell_size + self.cell_size // 2),
-                               ((x + 1) * self.cell_size + self.cell_size // 2, y * self.cell_size + self.cell_size // 2)], fill='black')
-            if (x, y + 1) in nodes:
-                self.draw.line([(x * self.cell_size + self.cell_size // 2, y * self.cell_size + self.cell_size // 2),
-                               (x * self.cell_size + self.cell_size // 2, (y + 1) * self.cell_size + self.cell_size // 2)], fill='black')
-
-        diagonal_connections = [((2, 1), (3, 2)), ((3, 4), (4, 5))]
-        for start, end in diagonal_connections:
-            start_center = (start[0] * self.cell_size + self.cell_size // 2, start[1] * self.cell_size + self.cell_size // 2)
-            end_center = (end[0] * self.cell_size + self.cell_size // 2, end[1] * self.cell_size + self.cell_size // 2)
-            self.draw.line([start_center, end_center], fill='black', width=2)
-
-    def draw_spawn_rectangle(self):
-        spawn_points = [(x, y) for y in range(self.board_height) for x in range(self.board_width)
-                        if self.board_manager.board[y][x] == 'S']
-        if spawn_points:
-            min_x = min(sp[0] for sp in spawn_points) * self.cell_size
-            min_y = min(sp[1] for sp in spawn_points) * self.cell_size
-            max_x = (max(sp[0] for sp in spawn_points) + 1) * self.cell_size
-            max_y = (max(sp[1] for sp in spawn_points) + 1) * self.cell_size
-            self.draw.rectangle([min_x, min_y, max_x, max_y], outline="blue", width=2)
+    def is_empty(self, coords):
+        return self.pieces.is_empty(cell_index(*coords))
 
-    def render_board(self):
-        for y in range(self.board_height):
-            for x in range(self.board_width):
-                cell_value = self.board_manager.board[y][x] if y < len(self.board_manager.board) else 'B'
-                cell_value = 'PC' if (y == 0 or y == self.board_height - 1) and x >= self.board_width - 2 else cell_value
-                self.draw_cell(x, y, cell_value)
-        self.draw_nodes_and_lines()
-        self.draw_spawn_rectangle()
-        return self.img
-
-    def save_image(self, path):
-        self.img.save(path)
+    def reachable_cells(self, coords, movement):
+        """Return every cell a piece at ``coords`` can move to with ``movement`` points."""
+        return self.reachability.destinations(coords, movement, self.pieces.occupied)
 
-    @staticmethod
-    def initialize_board():
-        # Initialize the game board with 8x7 dimensions
-        board = [["E" for _ in range(8)] for _ in range(7)]
-
-        # Set spawn (S) points
-        board[1][0] = "S"
-        board[1][6] = "S"
-        board[5][0] = "S"
-        board[5][6] = "S"
-
-        # Set goal (G) points
-        board[1][3] = "G"
-        board[5][3] = "G"
-
-        # Set bench (Y) rows on top and bottom and player character (PC) on the rightmost columns
-        for i in range(8):
-            board[0][i] = "Y"  # Top bench row
-            board[6][i] = "Y"  # Bottom bench row
-            if i in [6, 7]:  # Rightmost columns for knocked out pieces
-                for j in range(1, 6):
-                    board[j][i] = "PC"
+    @property
+    def position_hash(self):
+        """Zobrist hash of the piece layout; equal layouts always hash equal."""
+        return self.pieces.hash
 
-        return board
+    def copy_pieces(self):
+        """Return an independent copy of the piece layout for search and simulation."""
+        return self.pieces.copy()
 
     def move_piece(self, player_id, from_coords, to_coords):
-        piece = self.board[from_coords[0]][from_coords[1]]
-        if piece != player_id:  # TODO: sprites integration
-            return False
-        party = self.party_manager.get_party(player_id)
-
-        piece = self.board[from_coords[0]][from_coords[1]]
-        self.action_history.append(f"Moved from {from_coords} to {to_coords}")
+        source, target = cell_index(*from_coords), cell_index(*to_coords)
+        slot = self.player_slots.get(player_id)
+        if slot is None or self.pieces.owner_of(source) != slot:
+            raise ValueError("The selected piece does not belong to you.")
+        piece = self.pieces.pieces[source]
+        party = self.party_manager.get_party(player_id) if self.party_manager else []
 
         movement_points = next((pokemon['movement'] for pokemon in party if pokemon['name'] == piece), 1)
 
@@ -148,65 +91,157 @@ class BoardVisualizer:
         dy = abs(to_coords[1] - from_coords[1])
         distance = max(dx, dy)
 
-        if piece['owner'] != player_id:
-            raise ValueError("The selected piece does not belong to you.")
         if distance > movement_points:
             raise ValueError("Insufficient movement points.")
-        if self.board[to_coords[0]][to_coords[1]] != 'E':
+        if not self.pieces.is_empty(target):
             raise ValueError("Target cell is not empty.")
-        if self.is_path_blocked(from_coords, to_coords):
+        if self.pieces.is_path_blocked(source, target):
             raise ValueError("Path is blocked.")
 
-        if distance > movement_points:
-            return False
+        self.pieces.move(source, target)
+        self.action_history.append(f"Moved from {from_coords} to {to_coords}")
+        return True
 
-        if self.board[to_coords[0]][to_coords[1]] != 'E':
+    def move_piece_diagonally(self, from_coords, to_coords):
+        source, target = cell_index(*from_coords), cell_index(*to_coords)
+        if self.pieces.is_empty(source) or not self.pieces.is_empty(target):
             return False
-
-        if self.is_path_blocked(from_coords, to_coords):
+        if self.pieces.is_path_blocked(source, target):
             return False
 
-        self.board[to_coords[0]][to_coords[1]] = piece
-        self.board[from_coords[0]][from_coords[1]] = "E"
-        return True
-
-    def move_piece_diagonally(self, from_coords, to_coords):
-        x1, y1 = from_coords
-        x2, y2 = to_coords
-        step_x = 1 if x2 > x1 else -1
-        step_y = 1 if y2 > y1 else -1
-
-        for step in range(1, abs(x2 - x1) + 1):
-            new_coords = (x1 + step * step_x, y1 + step * step_y)
-            if self.board[new_coords[0]][new_coords[1]] != 'E':
-                return False
-
-        piece = self.board[from_coords[0]][from_coords[1]]
-        self.board[to_coords[0]][to_coords[1]] = piece
-        self.board[from_coords[0]][from_coords[1]] = 'E'
+        self.pieces.move(source, target)
         return True
 
     def is_path_blocked(self, from_coords, to_coords):
-        x1, y1 = from_coords
-        x2, y2 = to_coords
-        dx, dy = abs(x2 - x1), abs(y2 - y1)
-
-        if dx == dy:  # diagonal movement
-            for step in range(1, dx):
-                x, y = x1 + step if x1 < x2 else x1 - step, y1 + step if y1 < y2 else y1 - step
-                if self.board[x][y] != 'E':
-                    return True
-        elif x1 == x2:
-            for y in range(min(y1, y2) + 1, max(y1, y2)):
-                if self.board[x1][y] != 'E':
-                    return True
-        elif y1 == y2:
-            for x in range(min(x1, x2) + 1, max(x1, x2)):
-                if self.board[x][y1] != 'E':
-                    return True
-
-        return False
+        return self.pieces.is_path_blocked(cell_index(*from_coords), cell_index(*to_coords))
 
     def update_board(self, x, y, value):
-        # Update the board at a specific coordinate
+        # Update the terrain at a specific coordinate
         self.board[x][y] = value
+
+
+
+class BoardVisualizer:
+    # Rendered static layers (terrain, nodes, edges, regions), keyed by cell size and shared
+    # by every visualizer in the process
+    static_layers = {}
+    player_colors = ('red', 'white')
+    # Fast zlib setting: a board PNG is tens of KB either way, encode time is what players wait on
+    png_compress_level = 1
+    # Encoded PNGs by (cell size, position hash), so a position seen anywhere in the process is
+    # never rasterised or encoded twice
+    png_cache = LRUCache(512, max_weight=32 * 1024 * 1024, weigh=len)
+
+    def __init__(self, board_manager):
+        # PIL is only needed once a board is actually drawn, so keep it off the cog load path
+        from PIL import Image, ImageDraw
+
+        self.image_module = Image
+        self.draw_module = ImageDraw
+        self.board_manager = board_manager
+        self.cell_size = 100
+        self.colors = {
+            'G': 'purple',
+            'S': 'blue',
+            'E': 'green',
+            'P': 'black',
+            'B': 'grey',
+            'PC': 'pink',
+            'Y': 'yellow'
+        }
+        # Drawn in engine coordinates: x across, y down
+        self.board_width = ROWS
+        self.board_height = COLUMNS
+        self.image_width = self.cell_size * self.board_width
+        self.image_height = self.cell_size * self.board_height
+
+    def draw_cell(self, draw, x, y, cell_type):
+        top_left_corner = (x * self.cell_size, y * self.cell_size)
+        bottom_right_corner = ((x + 1) * self.cell_size, (y + 1) * self.cell_size)
+        draw.rectangle([top_left_corner, bottom_right_corner], fill=self.colors[cell_type], outline="black")
+
+    def cell_center(self, index):
+        x, y = cell_coords(index)
+        return x * self.cell_size + self.cell_size // 2, y * self.cell_size + self.cell_size // 2
+
+    @staticmethod
+    def terrain(index):
+        """Return the tile type of a cell, from the same spawns, goals and node graph the duel engine uses."""
+        if any(index in spawns for spawns in SPAWNS):
+            return 'S'
+        if index in GOALS:
+            return 'G'
+        return 'E' if ADJACENCY[index] else 'B'
+
+    def draw_nodes_and_lines(self, draw):
+        for index, neighbours in enumerate(ADJACENCY):
+            if not neighbours:
+                continue
+            center = self.cell_center(index)
+            draw.ellipse((center[0] - 5, center[1] - 5, center[0] + 5, center[1] + 5), fill='black')
+
+        for start, end in EDGES:
+            start_center, end_center = self.cell_center(start), self.cell_center(end)
+            # Diagonal shortcuts are drawn heavier than the grid
+            diagonal = start_center[0] != end_center[0] and start_center[1] != end_center[1]
+            draw.line([start_center, end_center], fill='black', width=2 if diagonal else 1)
+
+    def draw_spawn_outlines(self, draw):
+        # Each player's spawns are outlined in that player's piece colour
+        for slot, spawns in enumerate(SPAWNS):
+            for index in spawns:
+                x, y = cell_coords(index)
+                draw.rectangle([x * self.cell_size, y * self.cell_size,
+                                (x + 1) * self.cell_size - 1, (y + 1) * self.cell_size - 1],
+                               outline=self.player_colors[slot], width=4)
+
+    def render_background(self):
+        """Draw the parts of the board that never change during a duel."""
+        img = self.image_module.new('RGB', (self.image_width, self.image_height), 'white')
+        draw = self.draw_module.Draw(img)
+        for index in range(CELL_COUNT):
+            x, y = cell_coords(index)
+            self.draw_cell(draw, x, y, self.terrain(index))
+        self.draw_nodes_and_lines(draw)
+        self.draw_spawn_outlines(draw)
+        return img
+
+    @property
+    def background(self):
+        layer = self.static_layers.get(self.cell_size)
+        if layer is None:
+            layer = self.static_layers[self.cell_size] = self.render_background()
+        return layer
+
+    def draw_pieces(self, draw):
+        pieces = self.board_manager.pieces
+        radius = self.cell_size // 3
+        for slot, mask in enumerate(pieces.owners):
+            while mask:
+                low = mask & -mask
+                index = low.bit_length() - 1
+                mask ^= low
+                cx, cy = self.cell_center(index)
+                draw.ellipse((cx - radius, cy - radius, cx + radius, cy + radius),
+                             fill=self.player_colors[slot], outline='black', width=2)
+                draw.text((cx, cy), str(pieces.pieces[index]), fill='black', anchor='mm')
+
+    def render_board(self):
+        """Composite the current pieces onto a copy of the cached static layer."""
+        img = self.background.copy()
+        self.draw_pieces(self.draw_module.Draw(img))
+        return img
+
+    def render_png(self):
+        """Render the board and return it as an in-memory PNG buffer."""
+        key = (self.cell_size, self.board_manager.position_hash)
+        data = self.png_cache.get(key)
+        if data is None:
+            buffer = BytesIO()
+            self.render_board().save(buffer, format='PNG', compress_level=self.png_compress_level)
+            data = buffer.getvalue()
+            self.png_cache.put(key, data)
+        return BytesIO(data)
+
+    def render_file(self, filename='board.png'):
+        return File(self.render_png(), filename=filename)
@@ -0,0 +1,72 @@
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used entry and counts hits and misses.
+
+    Bounded by entry count, and optionally by total weight as measured by
+    ``weigh`` (for example ``len`` for byte strings). Not thread-safe; each
+    cache is meant to be used from a single thread, such as the event loop.
+    """
+
+    def __init__(self, max_size, max_weight=None, weigh=None):
+        if max_size < 1:
+            raise ValueError("An LRU cache needs room for at least one entry.")
+        self.max_size = max_size
+        self.max_weight = max_weight
+        self.weigh = weigh
+        self.weight = 0
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        value = self._entries.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def _weight_of(self, value):
+        return self.weigh(value) if self.weigh is not None else 0
+
+    def put(self, key, value):
+        self.pop(key)
+        self._entries[key] = value
+        self.weight += self._weight_of(value)
+        while len(self._entries) > self.max_size or (
+                self.max_weight is not None and self.weight > self.max_weight and len(self._entries) > 1):
+            _, evicted = self._entries.popitem(last=False)
+            self.weight -= self._weight_of(evicted)
+
+    def pop(self, key, default=None):
+        value = self._entries.pop(key, _MISSING)
+        if value is _MISSING:
+            return default
+        self.weight -= self._weight_of(value)
+        return value
+
+    def clear(self):
+        self._entries.clear()
+        self.weight = 0
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        summary = f"{len(self)}/{self.max_size} entries, {self.hits} hits, {self.misses} misses ({self.hit_rate:.0%} hit rate)"
+        if self.weigh is not None:
+            summary += f", {self.weight} bytes" if self.max_weight is None else f", {self.weight}/{self.max_weight} bytes"
+        return summary
@@ -1,4 +1,15 @@
 DUST_COSTS = {'UX': 5000, 'EX': 5000, 'R': 2000, 'UC': 1000, 'C': 500}
+RARITY_WEIGHTS = {'UX': 2, 'EX': 6, 'R': 20, 'UC': 32, 'C': 40}
+PITY_THRESHOLD = 50
+RATE_UP_MULTIPLIER = 5
 SINGLE_ROLL_COST = 50
 MULTI_ROLL_COST = 500
-MAX_PARTY_SIZE = 6
\ No newline at end of file
+BULK_ROLL_COUNT = 100
+BULK_ROLL_COST = 5000
+MAX_ADMIN_PULLS = 10000
+MAX_PARTY_SIZE = 6
+TURN_LIMIT = 300
+TURN_TIMEOUT = 120
+MATCHMAKING_TIMEOUT = 30
+FLASH_SALE_DURATION = 3600
+SNAPSHOT_INTERVAL = 10
@@ -0,0 +1,115 @@
+import asyncio
+import inspect
+import logging
+import math
+import time
+
+log = logging.getLogger("red.pokeduel.scheduler")
+
+
+class TimerHandle:
+    __slots__ = ('callback', 'args', 'slot', 'rounds', 'cancelled')
+
+    def __init__(self, callback, args, slot, rounds):
+        self.callback = callback
+        self.args = args
+        self.slot = slot
+        self.rounds = rounds
+        self.cancelled = False
+
+
+class TimerWheel:
+    """Hashed timer wheel: O(1) schedule and cancel, one background task for every timer.
+
+    Timers are hashed into ``slots`` buckets by expiry tick; each tick the
+    wheel visits one bucket and fires the timers whose remaining rounds have
+    run out. Callbacks may be plain functions or coroutine functions, and run
+    on the event loop no earlier than their delay and at most one tick late,
+    as long as the loop keeps up with the ticks.
+
+    Parameters:
+        tick (float): Resolution in seconds.
+        slots (int): Number of buckets; one full turn of the wheel is ``tick * slots`` seconds.
+        clock (callable): Monotonic time source.
+    """
+
+    def __init__(self, tick=1.0, slots=512, clock=time.monotonic):
+        self.tick = tick
+        self.clock = clock
+        self.buckets = [{} for _ in range(slots)]
+        self.current_tick = 0
+        self.next_tick_at = None
+        self._task = None
+        self._running = set()
+
+    def __len__(self):
+        return sum(len(bucket) for bucket in self.buckets)
+
+    def schedule(self, delay, callback, *args):
+        """Run ``callback(*args)`` after ``delay`` seconds and return a handle that can cancel it."""
+        # The next tick may be a fraction of a tick away, so count whole ticks from there rather
+        # than from now; counting from now would let the timer fire up to one tick early
+        until_next = self.tick if self.next_tick_at is None else max(0.0, self.next_tick_at - self.clock())
+        ticks = 1 + max(0, math.ceil((delay - until_next) / self.tick))
+        slots = len(self.buckets)
+        handle = TimerHandle(callback, args, (self.current_tick + ticks) % slots, (ticks - 1) // slots)
+        self.buckets[handle.slot][handle] = None
+        return handle
+
+    def cancel(self, handle):
+        if handle is not None and not handle.cancelled:
+            handle.cancelled = True
+            self.buckets[handle.slot].pop(handle, None)
+
+    def advance(self, now=None):
+        """Fire every timer due by ``now``, catching up on ticks missed while the loop was busy."""
+        now = self.clock() if now is None else now
+        if self.next_tick_at is None:
+            self.next_tick_at = now + self.tick
+        while self.next_tick_at <= now:
+            self.current_tick += 1
+            self.next_tick_at += self.tick
+            bucket = self.buckets[self.current_tick % len(self.buckets)]
+            due = []
+            for handle in bucket:
+                if handle.rounds:
+                    handle.rounds -= 1
+                else:
+                    due.append(handle)
+            for handle in due:
+                del bucket[handle]
+                handle.cancelled = True
+                self._fire(handle)
+
+    def _fire(self, handle):
+        try:
+            result = handle.callback(*handle.args)
+        except Exception:
+            log.exception("Timer callback %r failed", handle.callback)
+            return
+        if inspect.isawaitable(result):
+            task = asyncio.ensure_future(result)
+            self._running.add(task)
+            task.add_done_callback(self._finished)
+
+    def _finished(self, task):
+        self._running.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log.error("Timer callback failed", exc_info=task.exception())
+
+    async def run(self):
+        self.next_tick_at = self.clock() + self.tick
+        while True:
+            await asyncio.sleep(max(0.0, self.next_tick_at - self.clock()))
+            self.advance()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for task in self._running:
+            task.cancel()
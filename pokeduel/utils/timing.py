@@ -0,0 +1,29 @@
+import time
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    """Records how long each named startup phase takes."""
+
+    def __init__(self):
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    @property
+    def total(self):
+        return sum(self.phases.values())
+
+    def report(self):
+        if not self.phases:
+            return "No startup phases recorded yet."
+        width = max(len(name) for name in self.phases)
+        lines = [f"{name:<{width}}  {seconds * 1000:8.1f} ms" for name, seconds in self.phases.items()]
+        lines.append(f"{'total':<{width}}  {self.total * 1000:8.1f} ms")
+        return "\n".join(lines)
@@ -0,0 +1,42 @@
+import pytest
+
+pytest.importorskip('PIL')
+
+from PIL import ImageColor  # noqa: E402
+
+from pokeduel.logic.duel import GOALS, SPAWNS, DuelSession  # noqa: E402
+from pokeduel.utils.bitboard import CELL_COUNT  # noqa: E402
+from pokeduel.utils.board import BoardVisualizer  # noqa: E402
+
+
+def tile_colour(visualizer, image, index):
+    # Sampled off-centre, clear of the node dot and the grid lines
+    x, y = visualizer.cell_center(index)
+    offset = visualizer.cell_size // 4
+    return image.getpixel((x - offset, y + offset))
+
+
+def test_background_terrain_matches_the_engine():
+    session = DuelSession('test', (1, 2), [['Pikachu'], ['Dialga']], starting_slot=0, seed=1)
+    visualizer = BoardVisualizer(session)
+    image = visualizer.render_background()
+    assert image.size == (visualizer.cell_size * 8, visualizer.cell_size * 7)
+
+    expected = {index: 'E' for index in range(CELL_COUNT)}
+    expected.update({index: 'S' for spawns in SPAWNS for index in spawns})
+    expected.update({index: 'G' for index in GOALS})
+    for index, terrain in expected.items():
+        assert visualizer.terrain(index) == terrain
+        assert tile_colour(visualizer, image, index) == ImageColor.getrgb(visualizer.colors[terrain]), index
+
+
+def test_entered_pieces_are_drawn_on_spawn_tiles():
+    session = DuelSession('test', (1, 2), [['Pikachu'], ['Dialga']], starting_slot=0, seed=1)
+    spawn = SPAWNS[0][0]
+    session.apply(('enter', 0, spawn))
+    visualizer = BoardVisualizer(session)
+    background, board = visualizer.render_background(), visualizer.render_board()
+    assert tile_colour(visualizer, background, spawn) == ImageColor.getrgb(visualizer.colors['S'])
+    # The piece covers its cell's centre, which is inside the spawn tile
+    x, y = visualizer.cell_center(spawn)
+    assert board.getpixel((x, y + visualizer.cell_size // 5)) == ImageColor.getrgb(visualizer.player_colors[0])
@@ -0,0 +1,32 @@
+import pytest
+
+from pokeduel.data.catalog import compile_catalog, normalise_move
+
+
+def move(damage, move_type='White'):
+    return {'Size': 12, 'Name': 'Test Move', 'Move Type': move_type, 'Additional Notes': '', 'Damage': damage}
+
+
+def test_shipped_sources_compile():
+    catalog = compile_catalog()
+    assert catalog.pokemon and catalog.plates
+
+
+@pytest.mark.parametrize('damage, expected', [
+    ('80', (80, 0, '')),
+    ('40x', (40, 0, 'x')),
+    ('30+', (30, 0, '+')),
+    (' 70 ', (70, 0, '')),
+    (50, (50, 0, '')),
+    ('', (0, 0, '')),
+    ('☆☆', (0, 2, '')),
+])
+def test_normalise_move_reads_damage(damage, expected):
+    record = normalise_move(move(damage), 'Testmon')
+    assert (record['Damage'], record['Stars'], record['Damage Modifier']) == expected
+
+
+@pytest.mark.parametrize('damage', ['&start☆', 'lots', '20☆', '1.5'])
+def test_normalise_move_rejects_unreadable_damage(damage):
+    with pytest.raises(ValueError, match="Testmon: move 'Test Move'"):
+        normalise_move(move(damage), 'Testmon')
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('redbot')
+
+from redbot.pytest.core import config_fr, driver, override_data_path, red  # noqa: E402,F401
+
+import pokeduel  # noqa: E402
+from pokeduel.data.registry import get_registry  # noqa: E402
+from pokeduel.gatcha import NEXT_PAGE, PREVIOUS_PAGE, ShopView  # noqa: E402
+from pokeduel.logic.gacha import GachaEngine  # noqa: E402
+
+
+def test_setup_adds_the_cog(red, tmp_path, monkeypatch):
+    # The cog keeps its database next to the bot's working directory
+    monkeypatch.chdir(tmp_path)
+
+    async def main():
+        await pokeduel.setup(red)
+        cog = red.get_cog('PokeDuel')
+        assert cog is not None
+        assert red.get_command('newgame') is not None and red.get_command('shop') is not None
+        await red.remove_cog('PokeDuel')
+
+    asyncio.run(main())
+
+
+def test_shop_selects_page_through_the_whole_catalog():
+    registry = get_registry()
+
+    async def main():
+        view = ShopView(1, None, GachaEngine(registry))
+        pokemon_select, plate_select = (item for item in view.children if hasattr(item, 'show_page'))
+        for select, names in ((pokemon_select, registry.names), (plate_select, registry.plates_by_name)):
+            seen = []
+            for page in range(select.page_count):
+                select.show_page(page)
+                assert len(select.options) <= 25
+                seen += [option.value for option in select.options if option.value not in (PREVIOUS_PAGE, NEXT_PAGE)]
+            assert seen == list(names)
+
+    asyncio.run(main())
+
+
+def test_warm_up_restores_duels_when_a_step_fails(red, tmp_path, monkeypatch, caplog):
+    monkeypatch.chdir(tmp_path)
+    from pokeduel.pokeduel import PokeDuel
+
+    def missing_matrix(cog):
+        raise ImportError("No module named 'numpy'")
+
+    async def ready():
+        pass
+
+    restored = []
+
+    async def restore_duels():
+        restored.append(True)
+        return []
+
+    monkeypatch.setattr(PokeDuel, 'matchups', property(missing_matrix))
+    monkeypatch.setattr(red, 'wait_until_red_ready', ready)
+
+    async def main():
+        cog = PokeDuel(red)
+        monkeypatch.setattr(cog.game_manager, 'restore_duels', restore_duels)
+        try:
+            await cog.warm_up()
+        finally:
+            cog.scheduler.stop()
+            await cog.db.close()
+
+    asyncio.run(main())
+    assert restored == [True]
+    assert "Could not load the PokeDuel matchups" in caplog.text
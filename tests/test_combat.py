@@ -0,0 +1,99 @@
+import random
+
+from pokeduel.data.registry import get_registry
+from pokeduel.logic.combat import CombatManager, CombatState
+from pokeduel.logic.wheel import MISS_SEGMENT
+
+OUTCOMES = {'Player 1 Wins', 'Player 2 Wins', 'Draw'}
+
+
+def species(name, *moves):
+    return {'Name': name, 'Base Wheel Size': [
+        {'Size': 1, 'Name': move_name, 'Move Type': move_type, 'Damage': damage, 'Stars': stars,
+         'Additional Notes': notes}
+        for move_name, move_type, damage, stars, notes in moves]}
+
+
+def test_combat_calculation_runs_end_to_end():
+    registry = get_registry()
+    rng = random.Random(0)
+    for _ in range(200):
+        pokemon1, pokemon2 = (registry[name] for name in rng.sample(registry.names, 2))
+        outcome, reason, effects = CombatManager.combat_calculation(CombatState(), pokemon1, pokemon2, rng=rng)
+        assert outcome in OUTCOMES
+        assert isinstance(reason, str) and isinstance(effects, str)
+
+
+def test_combat_calculation_applies_the_winners_notes():
+    strong = species('Strong', ('Slam', 'White', 100, 0, 'Knocks the opponent back'))
+    weak = species('Weak', ('Tap', 'White', 10, 0, ''))
+    outcome, reason, effects = CombatManager.combat_calculation(CombatState(), strong, weak)
+    assert (outcome, reason) == ('Player 1 Wins', 'Slam')
+    assert effects == "Player 1's Pokemon applies Knocks the opponent back"
+
+
+def test_combat_calculation_treats_uncovered_pairs_as_a_draw():
+    # No rule covers White against Purple
+    white = species('White', ('Tackle', 'White', 50, 0, ''))
+    purple = species('Purple', ('Glare', 'Purple', 0, 2, ''))
+    outcome, reason, effects = CombatManager.combat_calculation(CombatState(), white, purple)
+    assert outcome == 'Draw'
+    assert effects == "No additional effects applied"
+
+
+def test_matchup_cache_is_bounded():
+    registry = get_registry()
+    cache = CombatManager.matchup_cache
+    cache.clear()
+    pokemon = registry[registry.names[0]]
+    for boost in range(cache.max_size + 10):
+        CombatManager.calculate_matchup(pokemon, pokemon, damage_boost1=boost)
+    assert len(cache) == cache.max_size
+    cache.clear()
+
+
+def with_status(pokemon, status):
+    return dict(pokemon, **{'Status Condition': status})
+
+
+def test_status_effects_work_on_catalog_records():
+    registry = get_registry()
+    pokemon = next(registry[name] for name in registry.names if len(registry[name]['Base Wheel Size']) > 1)
+    wheel = pokemon['Base Wheel Size']
+    for status in ('Paralysis', 'Burn', 'Confusion', 'Poison'):
+        for move in wheel:
+            assert CombatManager.apply_status_effects(with_status(pokemon, status), move) is not None
+
+
+def test_paralysis_misses_only_one_of_several_smallest_segments():
+    pokemon = species('Tied', ('Tackle', 'White', 50, 0, ''), ('Bite', 'White', 50, 0, ''),
+                      ('Glare', 'Purple', 0, 2, ''))
+    first, second, third = CombatManager.wheel_for(pokemon).moves
+    paralysed = with_status(pokemon, 'Paralysis')
+    assert CombatManager.apply_status_effects(paralysed, first)['Move Type'] == 'Red'
+    assert CombatManager.apply_status_effects(paralysed, second) is second
+    assert CombatManager.apply_status_effects(paralysed, third) is third
+
+
+def test_confusion_carries_overlays_to_the_next_segment():
+    pokemon = species('Dizzy', ('Tackle', 'White', 50, 0, ''), ('Glare', 'Purple', 0, 2, ''))
+    first, second = CombatManager.wheel_for(pokemon).moves
+    state = CombatState()
+    state.move_bonuses[('Player 1', 'Dizzy')] = {'Damage': 10, 'Stars': 1}
+    confused = with_status(pokemon, 'Confusion')
+    assert CombatManager.apply_status_effects(confused, second) is first
+
+    boosted = CombatManager.apply_status_effects(
+        confused, CombatManager.apply_move_bonuses(state, 'Player 1', pokemon, first))
+    assert (boosted['Name'], boosted['Damage'], boosted['Stars']) == ('Glare', 10, 3)
+    assert CombatManager.wheel_index(boosted, pokemon) == 1
+    assert second['Damage'] == 0 and second['Stars'] == 2
+
+
+def test_sleep_misses_like_the_solver():
+    sleeper = with_status(species('Sleeper', ('Tackle', 'White', 50, 0, '')), 'Sleep')
+    awake = species('Awake', ('Tap', 'White', 10, 0, ''))
+    move = CombatManager.apply_status_effects(sleeper, sleeper['Base Wheel Size'][0])
+    assert move == MISS_SEGMENT
+    assert CombatManager.determine_outcome(move, awake['Base Wheel Size'][0])[0] == 'Player 2 Wins'
+    assert CombatManager.calculate_matchup(sleeper, awake, status1='Sleep')['Player 2 Wins'] == 1
@@ -0,0 +1,149 @@
+import asyncio
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from pokeduel.data.database import AsyncDatabaseManager, DatabaseManager
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'pokeduel.sqlite')
+
+
+def run(db_path, steps, **options):
+    async def main():
+        db = AsyncDatabaseManager(db_path, **options)
+        try:
+            return await steps(db)
+        finally:
+            await db.close()
+    return asyncio.run(main())
+
+
+def test_set_pokemon_z_move_stores_and_replaces_the_choice(db_path):
+    async def steps(db):
+        await db.initialize_new_user(1, party=['Pikachu', 'Dialga'])
+        await db.set_pokemon_z_move(1, 'Dialga', 'Corkscrew Crash')
+        await db.set_pokemon_z_move(1, 'Pikachu', 'Catastropika')
+        await db.set_pokemon_z_move(1, 'Dialga', 'Devastating Drake')
+        return await db.get_z_moves(1), await db.get_z_moves(2)
+
+    chosen, other = run(db_path, steps)
+    assert chosen == {'Dialga': 'Devastating Drake', 'Pikachu': 'Catastropika'}
+    assert other == {}
+
+
+def test_storage_layer_imports_without_discord(db_path):
+    # The offline replay tools open the database with no Discord client installed
+    script = ("import sys; sys.modules['discord'] = None; "
+              "from pokeduel.logic.replay import main; sys.argv = ['replay', sys.argv[1]]; main()")
+    DatabaseManager(db_path).close()
+    result = subprocess.run([sys.executable, '-c', script, db_path], capture_output=True, text=True,
+                            cwd=Path(__file__).parents[1])
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.startswith("Replayed 0 duels")
+
+
+def test_writes_only_keep_their_own_users_reads_out_of_the_cache(db_path):
+    async def steps(db):
+        await db.initialize_new_user(1, party=['Pikachu'])
+        await db.initialize_new_user(2, party=['Dialga'])
+        # Hold the only reader so both reads are still in flight while user 1's write completes
+        gate = threading.Event()
+        db._read_executor.submit(gate.wait)
+        reads = [asyncio.ensure_future(db.get_user_party(user_id)) for user_id in (1, 2)]
+        await asyncio.sleep(0)
+        await db.add_to_party(1, 'Mew')
+        gate.set()
+        parties = await asyncio.gather(*reads)
+        return parties, db.cache.get((1, 'party')), db.cache.get((2, 'party'))
+
+    parties, cached_own, cached_other = run(db_path, steps, readers=1)
+    assert parties[1] == ['Dialga']
+    assert cached_own is None
+    assert cached_other == ['Dialga']
+
+
+def test_spend_refuses_to_overdraw(db_path):
+    db = DatabaseManager(db_path)
+    try:
+        db.initialize_new_user(1, crystals=100, dust=40, inventory=['Pikachu'])
+        assert db.spend_crystals(1, 150, ['Dialga'], ('standard', 3, None)) is None
+        assert db.spend_dust(2, 10, ['Dialga']) is None
+        assert db.get_crystals(1) == 100
+        assert db.get_inventory_counts(1) == {'Pikachu': 1}
+        assert db.get_pity(1, 'standard') == 0
+
+        assert db.spend_crystals(1, 100, ['Dialga', 'Pikachu'], ('standard', 2, None)) == 0
+        assert db.spend_dust(1, 40, ['Iron Plate']) == 0
+        assert db.get_inventory_counts(1) == {'Pikachu': 2, 'Dialga': 1, 'Iron Plate': 1}
+        assert db.get_pity(1, 'standard') == 2
+        with pytest.raises(ValueError):
+            db.spend(1, 'gold', 1)
+    finally:
+        db.close()
+
+
+def test_concurrent_spends_never_overdraw(db_path):
+    db = DatabaseManager(db_path)
+    db.initialize_new_user(1, dust=100)
+    db.close()
+    results = []
+    start = threading.Barrier(8)
+
+    def buy():
+        # Each thread has its own connection, so the spends really race in SQLite
+        db = DatabaseManager(db_path)
+        try:
+            start.wait()
+            results.append(db.spend_dust(1, 30, ['Pikachu']))
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=buy) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(result for result in results if result is not None) == [10, 40, 70]
+    assert results.count(None) == 5
+    db = DatabaseManager(db_path)
+    try:
+        assert db.get_dust(1) == 10
+        assert db.get_inventory_counts(1) == {'Pikachu': 3}
+    finally:
+        db.close()
+
+
+def test_legacy_blobs_migrate_into_the_relational_tables(db_path, monkeypatch):
+    legacy = DatabaseManager(db_path)
+    with legacy.conn:
+        legacy.conn.executemany(
+            "INSERT INTO users (id, crystals, dust, inventory, party) VALUES (?, 0, 0, ?, ?)",
+            [(1, '["Pikachu", "Pikachu", "Dialga"]', '["Pikachu", "Dialga"]'),
+             (2, '["Iron Plate"]', None),
+             (3, None, '["Mew"]')] +
+            [(user_id, '["Eevee"]', '[]') for user_id in range(4, 9)])
+    legacy.close()
+
+    # Small batches, so the migration has to resume across several transactions
+    monkeypatch.setattr(DatabaseManager, 'MIGRATION_BATCH_SIZE', 2)
+    db = DatabaseManager(db_path)
+    try:
+        assert db.get_inventory_counts(1) == {'Pikachu': 2, 'Dialga': 1}
+        assert db.get_user_party(1) == ['Pikachu', 'Dialga']
+        assert db.get_inventory(2) == ['Iron Plate'] and db.get_user_party(2) == []
+        assert db.get_inventory(3) == [] and db.get_user_party(3) == ['Mew']
+        assert all(db.get_inventory(user_id) == ['Eevee'] for user_id in range(4, 9))
+        assert db.conn.execute("SELECT COUNT(*) FROM users "
+                               "WHERE inventory IS NOT NULL OR party IS NOT NULL").fetchone() == (0,)
+        # Re-running finds nothing left to move, so nothing is counted twice
+        db.migrate_legacy_blobs()
+        assert db.get_inventory_counts(1) == {'Pikachu': 2, 'Dialga': 1}
+    finally:
+        db.close()
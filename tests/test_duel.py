@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from pokeduel.data.registry import get_registry
+from pokeduel.logic.combat import CombatManager
+from pokeduel.logic.duel import DuelSession
+from pokeduel.utils.bitboard import cell_index
+
+ATTACKER, DEFENDER = cell_index(3, 3), cell_index(3, 4)
+
+
+def battle(attacker, defender, seed):
+    """Play one battle from slot 0's attacker and return the outcome in ``calculate_matchup`` terms."""
+    session = DuelSession('test', (1, 2), [[], []], starting_slot=0, seed=seed)
+    session.pieces.place(0, attacker, ATTACKER)
+    session.pieces.place(1, defender, DEFENDER)
+    session.apply(('battle', ATTACKER, DEFENDER))
+    if session.pieces.pieces[DEFENDER] is None:
+        return 'Player 1 Wins'
+    if session.pieces.pieces[ATTACKER] is None:
+        return 'Player 2 Wins'
+    return 'Draw'
+
+
+def outcome_rates(outcomes):
+    return {outcome: outcomes.count(outcome) / len(outcomes) for outcome in ('Player 1 Wins', 'Player 2 Wins', 'Draw')}
+
+
+def test_battle_outcomes_match_the_exact_solver():
+    registry = get_registry()
+    rng = random.Random(0)
+    names = [name for name in registry.names if registry[name]['Base Wheel Size']]
+    outcomes, expected = [], {'Player 1 Wins': 0.0, 'Player 2 Wins': 0.0, 'Draw': 0.0}
+    trials = 3000
+    for seed in range(trials):
+        attacker, defender = rng.sample(names, 2)
+        outcomes.append(battle(attacker, defender, seed))
+        for outcome, probability in CombatManager.calculate_matchup(registry[attacker], registry[defender]).items():
+            expected[outcome] += probability / trials
+    for outcome, rate in outcome_rates(outcomes).items():
+        assert abs(rate - expected[outcome]) < 0.03, (outcome, rate, expected[outcome])
+
+
+def test_z_moves_battle_as_their_colour():
+    registry = get_registry()
+    attacker = next(name for name in registry.names
+                    if any('Z-Move' in move['Move Type'] for move in registry[name]['Base Wheel Size']))
+    defender = next(name for name in registry.names if name != attacker and registry[name]['Base Wheel Size'])
+    expected = CombatManager.calculate_matchup(registry[attacker], registry[defender])
+    rates = outcome_rates([battle(attacker, defender, seed) for seed in range(3000)])
+    for outcome, rate in rates.items():
+        assert abs(rate - expected[outcome]) < 0.04, (outcome, rate, expected[outcome])
+
+
+def test_players_cannot_send_forfeits():
+    session = DuelSession('test', (1, 2), [['Pikachu'], ['Dialga']], starting_slot=0, seed=1)
+    for slot in (0, 1):
+        assert not session.is_legal(('forfeit', slot))
+        with pytest.raises(ValueError):
+            session.apply(('forfeit', slot))
+    assert not session.finished
+
+
+def test_forfeit_concedes_and_replays_from_the_journal():
+    session = DuelSession('test', (1, 2), [['Pikachu'], ['Dialga']], starting_slot=0, seed=1)
+    assert session.forfeit(0) == ["Player 1 forfeits."]
+    assert (session.finished, session.winner, session.sequence) == (True, 1, 1)
+    with pytest.raises(ValueError):
+        session.forfeit(1)
+
+    replayed = DuelSession('test', (1, 2), [['Pikachu'], ['Dialga']], starting_slot=0, seed=1)
+    replayed.replay(['forfeit', 0])
+    assert (replayed.finished, replayed.winner) == (True, 1)
@@ -0,0 +1,93 @@
+import random
+from collections import Counter
+
+import pytest
+
+from pokeduel.data.registry import get_registry
+from pokeduel.logic.gacha import TOP_TIERS, AliasTable, Banner, GachaEngine
+from pokeduel.utils.constants import PITY_THRESHOLD, RARITY_WEIGHTS
+
+DRAWS = 100_000
+NAMES_BY_RARITY = {rarity: [f'{rarity}-{index}' for index in range(3)] for rarity in RARITY_WEIGHTS}
+
+
+def test_alias_table_matches_its_weights():
+    table = AliasTable(['a', 'b', 'c', 'd'], [1, 2, 3, 4])
+    rng = random.Random(1)
+    counts = Counter(table.draw(rng) for _ in range(DRAWS))
+    for outcome, weight in zip('abcd', (1, 2, 3, 4)):
+        assert counts[outcome] / DRAWS == pytest.approx(weight / 10, abs=0.01)
+
+
+def test_alias_table_needs_an_outcome():
+    with pytest.raises(ValueError):
+        AliasTable([], [])
+
+
+def test_banner_tiers_follow_rarity_weights():
+    banner = Banner('test', NAMES_BY_RARITY)
+    pulls, _ = banner.pull(DRAWS, rng=random.Random(2))
+    counts = Counter(rarity for _, rarity in pulls)
+    total = sum(RARITY_WEIGHTS.values())
+    for rarity, weight in RARITY_WEIGHTS.items():
+        assert counts[rarity] / DRAWS == pytest.approx(weight / total, abs=0.01)
+    assert all(name in NAMES_BY_RARITY[rarity] for name, rarity in pulls)
+
+
+def test_pity_guarantees_a_top_tier_on_the_threshold_pull():
+    banner = Banner('test', NAMES_BY_RARITY)
+    rng = random.Random(3)
+    # The pull after PITY_THRESHOLD - 1 misses is always EX/UX...
+    assert all(banner.pull(1, PITY_THRESHOLD - 1, rng)[0][0][1] in TOP_TIERS for _ in range(1000))
+    # ...but the one before it is an ordinary draw
+    rarities = Counter(banner.pull(1, PITY_THRESHOLD - 2, rng)[0][0][1] for _ in range(1000))
+    assert set(rarities) - set(TOP_TIERS)
+    # So no run of PITY_THRESHOLD pulls from a fresh counter goes without a top tier
+    for seed in range(200):
+        pulls, _ = banner.pull(PITY_THRESHOLD, 0, random.Random(seed))
+        assert any(rarity in TOP_TIERS for _, rarity in pulls), seed
+
+
+def test_pull_reports_pulls_since_the_last_top_tier():
+    banner = Banner('test', NAMES_BY_RARITY)
+    pulls, since_top = banner.pull(200, 0, random.Random(4))
+    last_top = max(index for index, (_, rarity) in enumerate(pulls) if rarity in TOP_TIERS)
+    assert since_top == len(pulls) - 1 - last_top
+    # A batch without a top tier leaves the stored counter alone
+    pulls, since_top = banner.pull(1, 0, random.Random(0))
+    assert pulls[0][1] not in TOP_TIERS and since_top is None
+
+
+def test_rate_up_boosts_species_within_their_tier():
+    banner = Banner('test', NAMES_BY_RARITY, rate_up={'C-0': 5})
+    rng = random.Random(5)
+    names = Counter(banner.pools['C'].draw(rng) for _ in range(DRAWS))
+    assert names['C-0'] / DRAWS == pytest.approx(5 / 7, abs=0.01)
+    assert names['C-1'] / DRAWS == pytest.approx(1 / 7, abs=0.01)
+    # Tier odds are untouched
+    assert banner.tiers.probability == Banner('standard', NAMES_BY_RARITY).tiers.probability
+
+
+def test_engine_rate_up_banner():
+    registry = get_registry()
+    engine = GachaEngine(registry, seed=6)
+    with pytest.raises(ValueError):
+        engine.start_rate_up('missing', ['MissingNo.'])
+    featured = registry.names_by_rarity['C'][0]
+    banner = engine.start_rate_up('featured', [featured])
+    assert engine.active_banner is banner and banner.rate_up == {featured: 5}
+    engine.end_rate_up()
+    assert engine.active_banner is engine.banners[GachaEngine.STANDARD]
+
+
+def test_flash_sale_pairs_a_top_tier_with_another_rarity():
+    registry = get_registry()
+    engine = GachaEngine(registry, seed=7)
+    for _ in range(100):
+        top, other = engine.rotate_flash_sale()
+        assert registry[top]['Rarity'] in TOP_TIERS
+        assert registry[other]['Rarity'] not in TOP_TIERS
+        assert engine.flash_sale_pokemon == (top, other)
+    # Seeded engines reproduce the same sales
+    first, second = GachaEngine(registry, seed=8), GachaEngine(registry, seed=8)
+    assert [first.rotate_flash_sale() for _ in range(5)] == [second.rotate_flash_sale() for _ in range(5)]
@@ -0,0 +1,73 @@
+import itertools
+import random
+
+import pytest
+
+from pokeduel.data.registry import get_registry
+from pokeduel.logic.combat import CombatManager
+from pokeduel.logic.duel import DuelSession
+from pokeduel.logic.headless import GreedyPolicy
+from pokeduel.utils.bitboard import cell_index
+
+ATTACKER, DEFENDER = cell_index(3, 3), cell_index(3, 4)
+
+
+def attack(attacker, defender, slot):
+    """Play one battle from ``slot``'s attacker and return +1, 0 or -1 from the attacker's side."""
+    session = DuelSession('test', (1, 2), [[], []], starting_slot=slot, seed=0)
+    session.pieces.place(slot, attacker, ATTACKER)
+    session.pieces.place(1 - slot, defender, DEFENDER)
+    session.apply(('battle', ATTACKER, DEFENDER))
+    return (session.pieces.pieces[DEFENDER] is None) - (session.pieces.pieces[ATTACKER] is None)
+
+
+def greedy_edge(attacker, defender, slot, policy=None):
+    session = DuelSession('test', (1, 2), [[], []], starting_slot=slot, seed=0)
+    session.pieces.place(slot, attacker, ATTACKER)
+    session.pieces.place(1 - slot, defender, DEFENDER)
+    return (policy or GreedyPolicy()).battle_edge(session, ATTACKER, DEFENDER)
+
+
+def engine_edge(attacker, defender, slot, monkeypatch):
+    """Battle every pair of wheel segments through the engine and return the attacker's exact edge."""
+    registry = get_registry()
+    wheels = {name: CombatManager.wheel_for(registry[name]).moves for name in (attacker, defender)}
+    total = sum(move['Size'] for move in wheels[attacker]) * sum(move['Size'] for move in wheels[defender])
+    edge = 0.0
+    for attacker_move, defender_move in itertools.product(wheels[attacker], wheels[defender]):
+        landed = {attacker: attacker_move, defender: defender_move}
+        monkeypatch.setattr(CombatManager, 'spin_move', staticmethod(lambda pokemon, rng: landed[pokemon['Name']]))
+        edge += attack(attacker, defender, slot) * attacker_move['Size'] * defender_move['Size'] / total
+    monkeypatch.undo()
+    return edge
+
+
+def test_greedy_edge_is_the_engines_odds_from_either_slot(monkeypatch):
+    registry = get_registry()
+    names = [name for name in registry.names if registry[name]['Base Wheel Size']][:100]
+
+    def asymmetry(pair):
+        return greedy_edge(*pair, 0) - greedy_edge(*pair, 1)
+
+    # Blue against Blue goes to Player 1, so the same attack is worth less from slot 1
+    pairs = [max(((first, second) for first in names for second in names if first != second), key=asymmetry)]
+    assert asymmetry(pairs[0]) > 0.05
+    pairs += random.Random(0).sample([(first, second) for first in names for second in names if first != second], 5)
+    for attacker, defender in pairs:
+        for slot in (0, 1):
+            assert greedy_edge(attacker, defender, slot) == pytest.approx(
+                engine_edge(attacker, defender, slot, monkeypatch)), (attacker, defender, slot)
+
+
+def test_greedy_edge_reads_the_matchup_matrix(tmp_path):
+    pytest.importorskip('numpy')
+    from pokeduel.data.matchups import MatchupMatrix, write_matchup_matrix
+
+    registry = get_registry()
+    names = [name for name in registry.names if registry[name]['Base Wheel Size']][:20]
+    write_matchup_matrix({name: registry[name] for name in names}, 'test', tmp_path)
+    policy = GreedyPolicy(matchups=MatchupMatrix.open(tmp_path, 'test'))
+    for attacker, defender in zip(names, reversed(names)):
+        for slot in (0, 1):
+            assert greedy_edge(attacker, defender, slot, policy) == pytest.approx(
+                greedy_edge(attacker, defender, slot), abs=1e-6)
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from pokeduel.data.catalog import get_catalog  # noqa: E402
+from pokeduel.data.matchups import INDEX_FILE, MatchupMatrix, write_matchup_matrix  # noqa: E402
+
+
+@pytest.fixture
+def pokemon_data():
+    pokemon = get_catalog().pokemon
+    return {name: pokemon[name] for name in list(pokemon)[:5]}
+
+
+def test_matrix_is_served_for_the_catalog_it_was_built_from(pokemon_data, tmp_path):
+    write_matchup_matrix(pokemon_data, get_catalog().source_hash, tmp_path)
+    matrix = MatchupMatrix.open(tmp_path)
+    assert matrix is not None
+    first, second = list(pokemon_data)[:2]
+    assert sum(matrix.lookup(first, second).values()) == pytest.approx(1)
+
+
+def test_stale_matrix_is_rejected(pokemon_data, tmp_path, caplog):
+    write_matchup_matrix(pokemon_data, 'an older catalog', tmp_path)
+    assert MatchupMatrix.open(tmp_path) is None
+    assert "Rebuild it" in caplog.text
+    assert MatchupMatrix.open(tmp_path, 'an older catalog') is not None
+
+
+def test_unstamped_matrix_is_rejected(pokemon_data, tmp_path):
+    write_matchup_matrix(pokemon_data, get_catalog().source_hash, tmp_path)
+    index_path = tmp_path / INDEX_FILE
+    index = json.loads(index_path.read_text())
+    index_path.write_text(json.dumps({'columns': index['columns'], 'species': index['species']}))
+    assert MatchupMatrix.open(tmp_path) is None
@@ -0,0 +1,83 @@
+from pokeduel.utils.scheduler import TimerWheel
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_wheel(slots=512):
+    clock = FakeClock()
+    wheel = TimerWheel(tick=1.0, slots=slots, clock=clock)
+    wheel.advance()
+    return wheel, clock
+
+
+def advance_to(wheel, clock, now):
+    clock.now = now
+    wheel.advance()
+
+
+def test_timer_never_fires_before_its_delay():
+    wheel, clock = make_wheel()
+    fired = []
+    # Scheduled a tenth of a tick before the next tick boundary
+    clock.now = 0.9
+    wheel.schedule(1.0, fired.append, 'due')
+    advance_to(wheel, clock, 1.0)
+    advance_to(wheel, clock, 1.8)
+    assert fired == []
+    advance_to(wheel, clock, 2.0)
+    assert fired == ['due']
+    assert len(wheel) == 0
+
+
+def test_timer_fires_at_most_one_tick_late():
+    wheel, clock = make_wheel()
+    fired = []
+    clock.now = 0.1
+    wheel.schedule(2.5, fired.append, 'due')
+    advance_to(wheel, clock, 2.0)
+    assert fired == []
+    advance_to(wheel, clock, 3.0)
+    assert fired == ['due']
+
+
+def test_cancelled_timer_does_not_fire():
+    wheel, clock = make_wheel()
+    fired = []
+    kept = wheel.schedule(3, fired.append, 'kept')
+    dropped = wheel.schedule(3, fired.append, 'dropped')
+    wheel.cancel(dropped)
+    wheel.cancel(dropped)
+    wheel.cancel(None)
+    assert len(wheel) == 1
+    advance_to(wheel, clock, 10)
+    assert fired == ['kept']
+    assert kept.cancelled and dropped.cancelled
+
+
+def test_timers_fire_in_expiry_order():
+    wheel, clock = make_wheel()
+    fired = []
+    for delay in (5, 1, 3, 2, 4):
+        wheel.schedule(delay, fired.append, delay)
+    # One late advance catches up on every missed tick in order
+    advance_to(wheel, clock, 20)
+    assert fired == [1, 2, 3, 4, 5]
+
+
+def test_timers_survive_several_revolutions():
+    wheel, clock = make_wheel(slots=4)
+    fired = []
+    wheel.schedule(10, fired.append, 'late')
+    wheel.schedule(2, fired.append, 'early')
+    for now in range(1, 10):
+        advance_to(wheel, clock, now)
+        assert 'late' not in fired, now
+    assert fired == ['early']
+    advance_to(wheel, clock, 10)
+    assert fired == ['early', 'late']